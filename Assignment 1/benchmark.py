@@ -0,0 +1,120 @@
+import argparse
+import os
+import sys
+from timeit import default_timer
+
+import numpy as np
+
+# The shared tooling lives one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bench
+
+import engines
+import main
+
+SAMPLE_FILES = ['sample-short.txt', 'sample-long.txt', 'sample-long-long.txt']
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+COLUMNS = [
+    ('engine', 'engine', '{}'),
+    ('corpus', 'corpus', '{}'),
+    ('words', 'words', '{:,}'),
+    ('distinct', 'distinct', '{:,}'),
+    ('words/s', 'words_per_s', '{:,.0f}'),
+    ('report ms', 'report_ms', '{:,.1f}'),
+    ('peak RSS KiB', 'peak_rss_kib', '{:,}'),
+    ('RSS growth KiB', 'rss_growth_kib', '{:,}'),
+]
+
+
+def rank_word(rank: int) -> str:
+    """Spell a vocabulary rank as a distinct lowercase word (0 -> a, 26 -> ba, ...)."""
+    letters = [LETTERS[rank % 26]]
+    rank //= 26
+    while rank > 0:
+        letters.append(LETTERS[rank % 26])
+        rank //= 26
+    return ''.join(reversed(letters))
+
+
+def zipf_corpus(num_words: int, vocabulary: int, exponent: float, seed: int) -> list:
+    """Draw `num_words` tokens whose ranks follow a Zipf distribution over `vocabulary` words."""
+    rng = np.random.default_rng(seed)
+    ranks = rng.zipf(exponent, num_words)
+    ranks = np.minimum(ranks, vocabulary) - 1  # Fold the unbounded tail onto the rarest word
+    words = [rank_word(rank) for rank in range(vocabulary)]
+    return [words[rank] for rank in ranks.tolist()]
+
+
+def load_corpus(corpus: dict) -> list:
+    """Build the token list described by a corpus specification."""
+    if corpus['kind'] == 'zipf':
+        return zipf_corpus(corpus['words'], corpus['vocabulary'], corpus['exponent'], corpus['seed'])
+    with open(corpus['path'], 'rb') as file:
+        return list(main.tokenize_stream(file))
+
+
+def measure(job: tuple) -> dict:
+    """Time one engine on one corpus; runs in a fresh process so peak RSS is its own."""
+    engine, corpus = job
+    words = load_corpus(corpus)
+    rss_before = bench.peak_rss_kib()
+
+    counter = engines.COUNTERS[engine]()
+    start = default_timer()
+    for word in words:
+        counter.insert(word)
+    insert_time = default_timer() - start
+
+    start = default_timer()
+    report = counter.sorted_report()
+    report_time = default_timer() - start
+    rss_after = bench.peak_rss_kib()
+
+    return {
+        'engine': engine,
+        'corpus': corpus['name'],
+        'words': len(words),
+        'distinct': len(report),
+        'insert_s': insert_time,
+        'words_per_s': len(words) / insert_time if insert_time > 0 else float('inf'),
+        'report_ms': report_time * 1000,
+        'peak_rss_kib': rss_after,
+        'rss_growth_kib': None if rss_after is None else rss_after - rss_before,
+        'top_word': report[0] if report else None,
+    }
+
+
+def main_benchmark():
+    """Benchmark every selected engine on synthetic Zipf corpora and the bundled samples."""
+    parser = argparse.ArgumentParser(description="Compare the word-count engines head to head.")
+    parser.add_argument('--engines', nargs='+', choices=sorted(engines.COUNTERS), default=sorted(engines.COUNTERS),
+                        help="engines to benchmark (default: all)")
+    parser.add_argument('--zipf-words', type=int, nargs='*', default=[100000, 1000000],
+                        help="token counts of the synthetic Zipf corpora (default: 100000 1000000)")
+    parser.add_argument('--vocabulary', type=int, default=200000,
+                        help="distinct words available to the Zipf corpora (default: 200000)")
+    parser.add_argument('--exponent', type=float, default=1.1,
+                        help="Zipf exponent, greater than 1 (default: 1.1)")
+    parser.add_argument('--seed', type=int, default=203, help="random seed for the Zipf corpora (default: 203)")
+    parser.add_argument('--files', nargs='*', default=SAMPLE_FILES,
+                        help="text files to benchmark (default: the bundled samples)")
+    parser.add_argument('--format', choices=bench.FORMATS, default='table', help="output format (default: table)")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    corpora = [
+        {'kind': 'zipf', 'name': f'zipf-{words}', 'words': words, 'vocabulary': args.vocabulary,
+         'exponent': args.exponent, 'seed': args.seed}
+        for words in args.zipf_words
+    ]
+    for filename in args.files:
+        path = filename if os.path.exists(filename) else os.path.join(here, filename)
+        corpora.append({'kind': 'file', 'name': os.path.basename(filename), 'path': path})
+
+    jobs = [(engine, corpus) for corpus in corpora for engine in args.engines]
+    bench.print_results(bench.run_isolated(measure, jobs), COLUMNS, args.format)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_benchmark())
@@ -0,0 +1,73 @@
+import abc
+import importlib.util
+import os
+
+import main
+
+# "main 2.py" has a space in its name, so it is loaded from its path
+_spec = importlib.util.spec_from_file_location("main_2", os.path.join(os.path.dirname(os.path.abspath(__file__)), "main 2.py"))
+main_2 = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(main_2)
+
+
+# WordCounter class describing the interface every word-count engine provides
+class WordCounter(abc.ABC):
+    name = ''
+
+    @abc.abstractmethod
+    def insert(self, word: str):
+        """Count one occurrence of the word."""
+
+    @abc.abstractmethod
+    def counts(self) -> list:
+        """Return every (word, count) pair, in no particular order."""
+
+    @abc.abstractmethod
+    def sorted_report(self) -> list:
+        """Return every (word, count) pair by count descending, then alphabetically."""
+
+
+# HashTableCounter adapts the hash tables of main.py
+class HashTableCounter(WordCounter):
+    def __init__(self, engine: str = 'chained'):
+        self.name = engine
+        self.table = main.ENGINES[engine]()
+
+    def insert(self, word: str):
+        self.table.table_insert(word)
+
+    def counts(self) -> list:
+        return self.table.get_word_counts()
+
+    def sorted_report(self) -> list:
+        return main.sort_word_counts(self.table.get_word_counts(), backend='numpy')
+
+
+# AVLTreeCounter adapts the StringPool and AVLTree of "main 2.py"
+class AVLTreeCounter(WordCounter):
+    name = 'avl'
+
+    def __init__(self):
+        self.pool = main_2.StringPool()
+        self.tree = main_2.AVLTree(self.pool)
+
+    def insert(self, word: str):
+        key = word.encode("utf-8")
+        self.tree.AVL_insert(key, len(key))
+
+    def counts(self) -> list:
+        return list(self.tree.words_in_range(''))
+
+    def sorted_report(self) -> list:
+        self.tree.in_order()
+        self.tree.merge_sort()
+        nodes = self.tree.order[1:self.tree.num_words + 1].tolist()
+        return [(self.pool.get_word(node), int(self.pool.get_word_count(node))) for node in nodes]
+
+
+# Word counters by name, each built fresh on every call
+COUNTERS = {
+    'chained': lambda: HashTableCounter('chained'),
+    'compact': lambda: HashTableCounter('compact'),
+    'avl': AVLTreeCounter,
+}
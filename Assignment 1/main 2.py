@@ -1,38 +1,72 @@
 # ---------------------- imports
 
+import argparse
+import os
 import sys
 
 import numpy as np
 
+# the report writer is shared by all three assignments and lives one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from report import FORMATS, Report
+except ImportError:
+    # without report.py only the text format is available, printed line by line
+    FORMATS = ["text"]
+
+    class Report:
+        def __init__(self, output_format="text"):
+            self.format = output_format
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            sys.stdout.flush()
+
+        def line(self, text=""):
+            print(text)
+
+        def table(self, name, columns, rows, line=None, title=None):
+            if title is not None:
+                print(title)
+            if line is not None:
+                for row in rows:
+                    print(line.format(*row))
+
 # ---------------------- string pool
 
 
 class StringPool:
 
-    pool_size = 500000
     max_word_count = 50000
 
-    num_chars = 0 # current index
-
     def __init__(self):
 
-        self.pool = np.zeros(self.pool_size, np.object_)
+        self.pool = bytearray()  # UTF-8 bytes of every distinct word, back to back
         self.word_start = np.zeros(self.max_word_count, int)
-        self.word_end = np.zeros(self.max_word_count, int)
+        self.word_end = np.zeros(self.max_word_count, int)  # one past the last byte
         self.word_count = np.zeros(self.max_word_count, int)
 
         return
 
-    def add_string_to_pool(self, node, word, word_length):
+    def grow(self, capacity):
 
-        self.word_start[node] = self.num_chars + 1
-        self.word_end[node] = self.num_chars + word_length
-        self.word_count[node] = 1
+        extra = capacity - len(self.word_count)
 
-        for i in range(word_length):  # i in [0, word_length - 1]
-            self.pool[self.num_chars + i + 1] = word[i]
+        self.word_start = np.concatenate((self.word_start, np.zeros(extra, int)))
+        self.word_end = np.concatenate((self.word_end, np.zeros(extra, int)))
+        self.word_count = np.concatenate((self.word_count, np.zeros(extra, int)))
 
-        self.num_chars += word_length
+        return
+
+    def add_string_to_pool(self, node, word, word_length):
+
+        # the AVL tree only adds words it has not seen, so each word is stored once
+        self.word_start[node] = len(self.pool)
+        self.pool += word
+        self.word_end[node] = len(self.pool)
+        self.word_count[node] = 1
 
         return
 
@@ -44,28 +78,21 @@ class StringPool:
 
     def compare_word(self, current, word, word_length):  # item 20 in guide
 
-        clen = self.word_end[current] - self.word_start[current] + 1
-        shorter = min(clen, word_length)
-        offset = self.word_start[current] - 1
-
-        for i in range(1, shorter+1):
-            if word[i-1] < self.pool[offset + i]:
-                return -1
-            else:
-                if word[i-1] > self.pool[offset + i]:
-                    return 1
+        # UTF-8 byte order matches code point order, so one C-level comparison does it
+        stored = self.pool[self.word_start[current]:self.word_end[current]]
 
-        if clen > word_length:
+        if word < stored:
             return -1
         else:
-            if clen < word_length:
+            if word > stored:
                 return 1
 
         return 0
 
     def get_word(self, i):
 
-        return "".join([self.pool[j] for j in range(self.word_start[i], self.word_end[i]+1)])
+        with memoryview(self.pool) as view:  # decode straight from the pool without copying
+            return str(view[self.word_start[i]:self.word_end[i]], "utf-8")
 
     def get_word_count(self, i):
 
@@ -73,10 +100,9 @@ class StringPool:
 
     def print_pool(self):
 
-        for i in range(0, self.max_word_count):
+        for i in range(0, len(self.word_count)):
             if self.word_count[i] != 0:
-                word = "".join([self.pool[j] for j in range(self.word_start[i], self.word_end[i]+1)])
-                print(self.word_start[i], self.word_end[i], self.word_count[i], word)
+                print(self.word_start[i], self.word_end[i], self.word_count[i], self.get_word(i))
 
         return
 
@@ -92,68 +118,105 @@ class AVLTree:
 
     def __init__(self, sp):
 
-        self.tree_left = np.zeros(self.max_word_count, int)
-        self.tree_right = np.zeros(self.max_word_count, int)
+        # node storage is int32 and doubles on demand; node 0 is the empty tree
+        self.tree_left = np.zeros(self.max_word_count, np.int32)
+        self.tree_right = np.zeros(self.max_word_count, np.int32)
+        self.tree_height = np.full(self.max_word_count, -1, np.int32)
+        self.tree_size = np.zeros(self.max_word_count, np.int32)  # number of words in each subtree
 
-        self.tree_height = np.empty(self.max_word_count, int)
-        for i in range(self.max_word_count):
-            self.tree_height[i] = -1
+        # report buffer, kept apart from the tree so it survives reporting
+        self.order = np.zeros(self.max_word_count, np.int32)  # nodes by position, from 1
 
         self.sp = sp
 
         return
 
-    def AVL_insert(self, word, word_length):  # public method
+    def __grow(self):
+
+        extra = len(self.tree_left)
 
-        self.root = self.__AVL_insert(self.root, word, word_length)
+        self.tree_left = np.concatenate((self.tree_left, np.zeros(extra, np.int32)))
+        self.tree_right = np.concatenate((self.tree_right, np.zeros(extra, np.int32)))
+        self.tree_height = np.concatenate((self.tree_height, np.full(extra, -1, np.int32)))
+        self.tree_size = np.concatenate((self.tree_size, np.zeros(extra, np.int32)))
+        self.order = np.concatenate((self.order, np.zeros(extra, np.int32)))
+        self.sp.grow(len(self.tree_left))
 
         return
 
-    def __AVL_insert(self, node, word, word_length):  # private method prefixed by __
+    def AVL_insert(self, word, word_length):  # public method
 
-        if node == 0:
-            # Add a word to the tree 16
-            self.num_words += 1
-            node = self.num_words
+        # walk down, remembering each node and the side taken from it
+        path = []
+        node = self.root
 
-            self.sp.add_string_to_pool(node, word, word_length)
+        while node != 0:
+            test = self.sp.compare_word(node, word, word_length)
 
-            self.tree_left[node] = 0
-            self.tree_right[node] = 0
-            self.tree_height[node] = 0
+            if test == 0:
+                self.sp.increment_word_count(node)
+                return
 
-            return node
+            path.append((node, test < 0))
+            node = self.tree_left[node] if test < 0 else self.tree_right[node]
 
-        test = self.sp.compare_word(node, word, word_length)
+        # Add a word to the tree 16
+        self.num_words += 1
+        if self.num_words >= len(self.tree_left):
+            self.__grow()
+        node = self.num_words
 
-        if test < 0:
-            self.tree_left[node] = self.__AVL_insert(self.tree_left[node], word, word_length)
+        self.sp.add_string_to_pool(node, word, word_length)
 
-            # Left insertion balance check 17
-            if self.tree_height[self.tree_left[node]] - self.tree_height[self.tree_right[node]] == 2:
-                test = self.sp.compare_word(self.tree_left[node], word, word_length)
-                if test < 0:
-                    node = self.__rotate_right(node)
-                else:
-                    node = self.__double_right(node)
+        self.tree_left[node] = 0
+        self.tree_right[node] = 0
+        self.tree_height[node] = 0
+        self.tree_size[node] = 1
+
+        # every subtree on the path gained one word
+        for parent, went_left in path:
+            self.tree_size[parent] += 1
+
+        # walk back up, relinking and rebalancing each subtree on the path
+        child_went_left = True
 
-        elif test > 0:
-            self.tree_right[node] = self.__AVL_insert(self.tree_right[node], word, word_length)
+        for parent, went_left in reversed(path):
+            old_height = self.tree_height[parent]
 
-            # Right insertion balance check 18
-            if self.tree_height[self.tree_right[node]] - self.tree_height[self.tree_left[node]] == 2:
-                test = self.sp.compare_word(self.tree_right[node], word, word_length)
-                if test < 0:
-                    node = self.__double_left(node)
+            if went_left:
+                self.tree_left[parent] = node
+
+                # Left insertion balance check 17
+                if self.tree_height[self.tree_left[parent]] - self.tree_height[self.tree_right[parent]] == 2:
+                    if child_went_left:
+                        node = self.__rotate_right(parent)
+                    else:
+                        node = self.__double_right(parent)
                 else:
-                    node = self.__rotate_left(node)
+                    node = parent
 
-        else:
-            self.sp.increment_word_count(node)
+            else:
+                self.tree_right[parent] = node
+
+                # Right insertion balance check 18
+                if self.tree_height[self.tree_right[parent]] - self.tree_height[self.tree_left[parent]] == 2:
+                    if child_went_left:
+                        node = self.__double_left(parent)
+                    else:
+                        node = self.__rotate_left(parent)
+                else:
+                    node = parent
 
-        self.tree_height[node] = max(self.tree_height[self.tree_left[node]], self.tree_height[self.tree_right[node]]) + 1
+            self.tree_height[node] = max(self.tree_height[self.tree_left[node]], self.tree_height[self.tree_right[node]]) + 1
 
-        return node
+            if node == parent and self.tree_height[node] == old_height:
+                return  # this subtree is unchanged, so nothing above it changes either
+
+            child_went_left = went_left
+
+        self.root = node
+
+        return
 
     def __rotate_right(self, node):  # item 22 in guide
 
@@ -162,6 +225,8 @@ class AVLTree:
         self.tree_right[k1] = node
         self.tree_height[node] = max(self.tree_height[self.tree_left[node]], self.tree_height[self.tree_right[node]]) + 1
         self.tree_height[k1] = max(self.tree_height[self.tree_left[k1]], self.tree_height[self.tree_right[k1]]) + 1
+        self.tree_size[node] = self.tree_size[self.tree_left[node]] + self.tree_size[self.tree_right[node]] + 1
+        self.tree_size[k1] = self.tree_size[self.tree_left[k1]] + self.tree_size[self.tree_right[k1]] + 1
 
         return k1
 
@@ -180,6 +245,8 @@ class AVLTree:
 
         self.tree_height[node] = max(self.tree_height[self.tree_left[node]], self.tree_height[self.tree_right[node]]) + 1
         self.tree_height[k1] = max(self.tree_height[self.tree_left[k1]], self.tree_height[self.tree_right[k1]]) + 1
+        self.tree_size[node] = self.tree_size[self.tree_left[node]] + self.tree_size[self.tree_right[node]] + 1
+        self.tree_size[k1] = self.tree_size[self.tree_left[k1]] + self.tree_size[self.tree_right[k1]] + 1
 
         return k1
 
@@ -190,6 +257,95 @@ class AVLTree:
 
         return node
 
+    # ---------------------- order-statistics queries
+
+    def rank(self, word):  # number of words alphabetically before word
+
+        return self.__rank(word.encode("utf-8"))
+
+    def __rank(self, word):
+
+        node = self.root
+        count = 0
+
+        while node != 0:
+            test = self.sp.compare_word(node, word, len(word))
+            if test < 0:
+                node = self.tree_left[node]
+            else:
+                if test > 0:
+                    count += self.tree_size[self.tree_left[node]] + 1
+                    node = self.tree_right[node]
+                else:
+                    count += self.tree_size[self.tree_left[node]]
+                    break
+
+        return int(count)
+
+    def select(self, k):  # the word at position k (from 0) in alphabetical order
+
+        if k < 0 or k >= self.tree_size[self.root]:
+            raise IndexError("Word rank out of range")
+
+        node = self.root
+
+        while True:
+            left_size = self.tree_size[self.tree_left[node]]
+            if k < left_size:
+                node = self.tree_left[node]
+            else:
+                if k > left_size:
+                    k -= left_size + 1
+                    node = self.tree_right[node]
+                else:
+                    return self.sp.get_word(node)
+
+    def count_prefix(self, prefix):  # number of words starting with prefix
+
+        low, high = self.__prefix_bounds(prefix)
+
+        return self.__rank(high) - self.__rank(low)
+
+    def words_with_prefix(self, prefix):  # (word, count) pairs starting with prefix, alphabetically
+
+        low, high = self.__prefix_bounds(prefix)
+
+        return self.__range(low, high)
+
+    def words_in_range(self, low, high=None):  # (word, count) pairs with low <= word < high, alphabetically
+
+        return self.__range(low.encode("utf-8"), None if high is None else high.encode("utf-8"))
+
+    @staticmethod
+    def __prefix_bounds(prefix):
+
+        # no UTF-8 text contains the byte 0xff, so prefix + 0xff sorts after every word with the prefix
+        low = prefix.encode("utf-8")
+
+        return low, low + b"\xff"
+
+    def __range(self, low, high):
+
+        # in-order walk with an explicit stack that skips every subtree left of low
+        stack = []
+        node = self.root
+
+        while node != 0 or stack:
+            while node != 0:
+                if self.sp.compare_word(node, low, len(low)) > 0:
+                    node = self.tree_right[node]  # node and its left subtree are below low
+                else:
+                    stack.append(node)
+                    node = self.tree_left[node]
+
+            node = stack.pop()
+            if high is not None and self.sp.compare_word(node, high, len(high)) <= 0:
+                return
+
+            yield self.sp.get_word(node), int(self.sp.get_word_count(node))
+
+            node = self.tree_right[node]
+
     def in_order(self):
 
         self.index = 0
@@ -205,89 +361,127 @@ class AVLTree:
         self.__in_order(self.tree_left[node])
 
         self.index += 1
-        self.tree_height[self.index] = node
+        self.order[self.index] = node
 
         self.__in_order(self.tree_right[node])
 
         return
 
-    def merge_sort(self):
+    def merge_sort(self, method="radix"):  # order positions 1..num_words by frequency, keeping alphabetical ties
+
+        n = self.num_words
+        nodes = self.order[1:n+1]
+        counts = self.sp.word_count[nodes]
 
-        self.__merge_sort(1, self.num_words)
+        if method == "radix":
+            # counts are small bounded integers; NumPy sorts 16-bit keys stably with a linear-time radix sort
+            keys = counts.max(initial=0) - counts
+            if n > 0 and keys.max() < 2**16:
+                keys = keys.astype(np.uint16)
+            self.order[1:n+1] = nodes[np.argsort(keys, kind="stable")]
+        else:
+            if method == "merge":
+                self.order[1:n+1] = self.__merge_sort(nodes.tolist(), counts.tolist())
+            else:
+                raise ValueError("Unknown sort method: " + method)
 
         return
 
-    def __merge_sort(self, left, right):
+    def __merge_sort(self, nodes, counts):
 
-        if left < right:
-            mid = (left + right) // 2
-            self.__merge_sort(left, mid)
-            self.__merge_sort(mid + 1, right)
-            self.__merge(left, mid, mid + 1, right)
+        # bottom-up merge of positions, swapping source and destination after each pass
+        n = len(nodes)
+        src = list(range(n))
+        dst = [0] * n
+        width = 1
 
-        return
+        while width < n:
+            for left in range(0, n, 2 * width):
+                mid = min(left + width, n)
+                right = min(left + 2 * width, n)
+                self.__merge(src, dst, counts, left, mid, right)
+            src, dst = dst, src
+            width *= 2
+
+        return [nodes[i] for i in src]
 
-    def __merge(self, l1, l2, r1, r2):
+    @staticmethod
+    def __merge(src, dst, counts, left, mid, right):
 
-        apos = l1
-        bpos = r1
-        cpos = l1
+        apos = left
+        bpos = mid
+        cpos = left
 
-        while (apos <= l2) and (bpos <= r2):
-            if self.sp.get_word_count(self.tree_height[apos]) >= self.sp.get_word_count(self.tree_height[bpos]):
-                self.tree_left[cpos] = self.tree_height[apos]
-                cpos += 1
+        while (apos < mid) and (bpos < right):
+            if counts[src[apos]] >= counts[src[bpos]]:
+                dst[cpos] = src[apos]
                 apos += 1
             else:
-                self.tree_left[cpos] = self.tree_height[bpos]
-                cpos += 1
+                dst[cpos] = src[bpos]
                 bpos += 1
-
-        while apos <= l2:
-            self.tree_left[cpos] = self.tree_height[apos]
             cpos += 1
-            apos += 1
 
-        while bpos <= r2:
-            self.tree_left[cpos] = self.tree_height[bpos]
-            cpos += 1
-            bpos += 1
-
-        for cpos in range(l1, r2+1):
-            self.tree_height[cpos] = self.tree_left[cpos]
+        # one run is used up; the rest of the other is already in order
+        dst[cpos:cpos + mid - apos] = src[apos:mid]
+        cpos += mid - apos
+        dst[cpos:right] = src[bpos:right]
 
         return
 
     def print_tree(self):
 
         for i in range(1, self.num_words+1):
-            if self.tree_height[i] != -1:
-                print(self.sp.get_word(self.tree_height[i]), self.sp.get_word_count(self.tree_height[i]))
+            print(self.sp.get_word(self.order[i]), self.sp.get_word_count(self.order[i]))
 
         return
 
-    def print_top_ten(self):
+    def __report_rows(self, first, last, unique=False):  # (word, count) for order[first:last]
+
+        counts = self.sp.word_count
+        for node in self.order[first:last].tolist():
+            count = int(counts[node])
+            if not unique or count == 1:
+                yield self.sp.get_word(node), count
 
-        print("The first 10 words sorted alphabetically within frequency:")
-        for i in range(1, 10+1):
-            print("The word:", self.sp.get_word(self.tree_height[i]), "occurs", self.sp.get_word_count(self.tree_height[i]), "times.")
+    def print_top_ten(self, report):
+
+        report.table("top_10", ("word", "count"), self.__report_rows(1, min(10, self.num_words)+1),
+                     line="The word: {} occurs {} times.",
+                     title="The first 10 words sorted alphabetically within frequency:")
 
         return
 
-    def print_unique(self):
+    def print_unique(self, report):
 
-        print("The unique words sorted alphabetically:")
-        for i in range(1, self.num_words+1):
-            if self.sp.get_word_count(self.tree_height[i]) == 1:
-                print("The word:", self.sp.get_word(self.tree_height[i]), "occurs", self.sp.get_word_count(self.tree_height[i]), "times.")
+        report.table("unique_words", ("word", "count"), self.__report_rows(1, self.num_words+1, unique=True),
+                     line="The word: {} occurs {} times.", title="The unique words sorted alphabetically:")
+
+        return
+
+    def print_last_ten(self, report):
+
+        report.table("last_10", ("word", "count"), self.__report_rows(max(1, self.num_words-9), self.num_words+1),
+                     line="The word: {} occurs {} times.",
+                     title="The last 10 words sorted alphabetically within frequency:")
 
         return
 
-    def print_last_ten(self):
+    def print_report(self, output_format="text"):  # can be called at any time; the tree is left intact
+
+        self.in_order()
+
+        self.merge_sort()
+
+        with Report(output_format) as report:  # every line is buffered and written in bulk
+
+            report.line()
+            self.print_top_ten(report)
+
+            report.line()
+            self.print_last_ten(report)
 
-        print("The last 10 words sorted alphabetically within frequency:")
-        for i in range(self.num_words-9, self.num_words+1):
-            print("The word:", self.sp.get_word(self.tree_height[i]), "occurs", self.sp.get_word_count(self.tree_height[i]), "times.")
+            report.line()
+            self.print_unique(report)
 
         return
 
@@ -308,6 +502,10 @@ def process_word(word):
 
 def main():
 
+    parser = argparse.ArgumentParser(description="Count the words in a text file with an AVL tree.")
+    parser.add_argument("--format", choices=FORMATS, default="text", help="output format (default: text)")
+    args = parser.parse_args()
+
     sp = StringPool()
     avl = AVLTree(sp)
 
@@ -331,21 +529,11 @@ def main():
                 pw = process_word(w)  # may result in no word e.g. contained no alpha characters
 
                 if len(pw) > 0:
+                    pw = pw.encode("utf-8")
                     avl.AVL_insert(pw, len(pw))
 
-    avl.in_order()
-
-    avl.merge_sort()
-
     # print output
-    print()
-    avl.print_top_ten()
-
-    print()
-    avl.print_last_ten()
-
-    print()
-    avl.print_unique()
+    avl.print_report(args.format)
 
     return
 
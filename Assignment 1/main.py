@@ -1,60 +1,214 @@
+import argparse
+import array
+import json
+import math
+import multiprocessing
+import os
+import re
 import sys
 import numpy as np
 
+# The report writer is shared by all three assignments and lives one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from report import FORMATS, Report
+except ImportError:
+    # Run on its own, without report.py, the program prints its prose directly
+    FORMATS = ['text']
 
-def string_hash(word: str, size: int) -> int:
-    """Compute a hash index for the given word based on the table size."""
-    hash_value = 0
-    prime = 31  # A small prime number
-    for char in word:
-        hash_value = (hash_value * prime + ord(char)) % size
-    return hash_value
+    class Report:
+        def __init__(self, output_format: str = 'text'):
+            self.format = output_format
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            sys.stdout.flush()
+
+        def table(self, name: str, columns: tuple, rows, line: str = None, title: str = None):
+            if title is not None:
+                print(title)
+            if line is not None:
+                for row in rows:
+                    print(line.format(*row))
+
+CHUNK_SIZE = 1 << 20  # Bytes read from the input file per chunk
+MIN_RANGE_SIZE = 1 << 20  # Smallest byte range handed to a worker process
+INDEX_MAGIC = b'WCINDEX2'  # First bytes of a saved word index
+INDEX_HEADER_SIZE = 32  # Magic, word count, blob size and ledger size
+
+# ASCII whitespace recognised by str.split(); words never straddle these bytes
+WORD_BREAKS = b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f'
+ASCII_LOWER = bytes.maketrans(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ', b'abcdefghijklmnopqrstuvwxyz')
+ASCII_NON_WORD = bytes(byte for byte in range(128) if not chr(byte).isalpha() and byte not in WORD_BREAKS)
+NON_WORD_PATTERN = re.compile(r'[^a-z\s]+')
+
+HASH_PRIME = (1 << 61) - 1  # Mersenne prime modulus for the polynomial hash
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15  # Odd 64-bit constant (golden ratio) to spread the bits
+HASH_MASK = (1 << 64) - 1
+
+
+def word_hash(key: bytes) -> int:
+    """Compute a full-width 64-bit hash of a word's bytes, independent of any table size."""
+    hash_value = int.from_bytes(key, 'big') % HASH_PRIME  # Polynomial hash in base 256
+    hash_value = (hash_value * HASH_MULTIPLIER) & HASH_MASK
+    return hash_value ^ (hash_value >> 32)  # Fold the well-mixed high bits into the low bits
 
 
 class HashNode:
-    def __init__(self, value=None):
+    def __init__(self, value=None, hash_value: int = 0):
         self.value = value
         self.count = 0 if value is None else 1
+        self.hash_value = hash_value  # Full-width hash, kept so resizing never rehashes the word
         self.next = None
 
-    def increment(self):
-        self.count += 1
+    def increment(self, amount: int = 1):
+        self.count += amount
+
+
+def chunk_words(data: bytes) -> list:
+    """Split a chunk of UTF-8 text into lowercase words containing only the letters a-z."""
+    if data.isascii():
+        # Fast path: lowercase and drop non-letters in one C-level pass over the raw bytes
+        return data.translate(ASCII_LOWER, ASCII_NON_WORD).decode('ascii').split()
+    text = data.decode('utf-8').lower()
+    return NON_WORD_PATTERN.sub('', text).split()
+
+
+def tokenize_stream(file, chunk_size: int = CHUNK_SIZE, limit: int = None):
+    """Yield the words of a binary file, reading it in large chunks.
+
+    A word is a whitespace-separated field, lowercased, with every character outside a-z
+    removed. Bytes after the last whitespace in a chunk are carried over to the next read so
+    that words split across chunk boundaries are kept whole. If `limit` is given, at most that
+    many bytes are read from the current position.
+    """
+    carry = b''
+    while limit is None or limit > 0:
+        chunk = file.read(chunk_size if limit is None else min(chunk_size, limit))
+        if not chunk:
+            break
+        if limit is not None:
+            limit -= len(chunk)
+        chunk = carry + chunk
+        cut = max(chunk.rfind(byte) for byte in WORD_BREAKS) + 1
+        carry = chunk[cut:]
+        yield from chunk_words(chunk[:cut])
+    yield from chunk_words(carry)
 
 
 # HashTable class to manage word counts using a hash table
 class HashTable:
-    def __init__(self, size: int = 50000):
+    def __init__(self, size: int = 50000, max_load_factor: float = 0.75, max_chain_length: int = 16):
         self.size = size
         self.table = np.array([HashNode() for _ in range(size)], dtype=np.object_)
         self.empty_count = size
         self.longest_chain = 0
+        self.num_words = 0
+        self.max_load_factor = max_load_factor  # Grow once words per slot passes this
+        self.max_chain_length = max_chain_length  # Grow once any chain gets longer than this
+        self.resize_events = []
 
-    def table_insert(self, word: str):
-        hash_index = string_hash(word, self.size)
-        node = self.table[hash_index]
+    def table_insert(self, word: str, count: int = 1):
+        hash_value = word_hash(word.encode())
+        node = self.table[hash_value % self.size]
 
         if node.value is None:
             node.value = word
-            node.increment()
+            node.hash_value = hash_value
+            node.increment(count)
             self.empty_count -= 1
+            self.num_words += 1
+            self.check_resize()
         else:
-            self.chain_insert(word, node)
+            self.chain_insert(word, node, hash_value, count)
 
-    def chain_insert(self, word: str, node: HashNode):
+    def chain_insert(self, word: str, node: HashNode, hash_value: int, count: int = 1):
         current_node = node
         chain_length = 0
 
         while current_node is not None:
-            if current_node.value == word:
-                current_node.increment()
+            if current_node.hash_value == hash_value and current_node.value == word:
+                current_node.increment(count)
                 return
             chain_length += 1
             if current_node.next is None:
                 break
             current_node = current_node.next
 
-        current_node.next = HashNode(word)
+        current_node.next = HashNode(word, hash_value)
+        current_node.next.count = count
         self.longest_chain = max(self.longest_chain, chain_length + 1)
+        self.num_words += 1
+        self.check_resize()
+
+    def check_resize(self):
+        """Double the table when the load factor or the longest chain crosses its threshold."""
+        if self.num_words > self.max_load_factor * self.size:
+            self.resize(self.size * 2, 'load factor')
+        # A long chain in a sparse table means colliding hashes that growing cannot separate
+        elif self.longest_chain > self.max_chain_length and self.num_words * 4 >= self.size:
+            self.resize(self.size * 2, 'chain length')
+
+    def resize(self, size: int, reason: str = 'manual'):
+        """Move every node into a table of `size` slots using its stored hash."""
+        old_table = self.table
+        self.resize_events.append({
+            'old_size': self.size,
+            'new_size': size,
+            'reason': reason,
+            'num_words': self.num_words,
+            'longest_chain': self.longest_chain,
+        })
+
+        self.size = size
+        self.table = np.array([HashNode() for _ in range(size)], dtype=np.object_)
+        self.empty_count = size
+        chain_lengths = [0] * size
+
+        for node in old_table:
+            current_node = node if node.value is not None else None
+            while current_node is not None:
+                next_node = current_node.next
+                hash_index = current_node.hash_value % size
+                head = self.table[hash_index]
+                if head.value is None:
+                    head.value = current_node.value
+                    head.count = current_node.count
+                    head.hash_value = current_node.hash_value
+                    self.empty_count -= 1
+                else:
+                    current_node.next = head.next  # Reuse the node as the second link of the chain
+                    head.next = current_node
+                chain_lengths[hash_index] += 1
+                current_node = next_node
+
+        self.longest_chain = max(chain_lengths)
+
+    def chain_length_histogram(self) -> dict:
+        """Return a mapping from chain length to the number of slots with that length."""
+        histogram = {}
+        for node in self.table:
+            chain_length = 0
+            current_node = node
+            while current_node is not None and current_node.value is not None:
+                chain_length += 1
+                current_node = current_node.next
+            histogram[chain_length] = histogram.get(chain_length, 0) + 1
+        return histogram
+
+    def get_stats(self) -> dict:
+        """Report the table size, load, resize events and chain-length histogram."""
+        return {
+            'size': self.size,
+            'num_words': self.num_words,
+            'empty_count': self.empty_count,
+            'load_factor': self.num_words / self.size,
+            'longest_chain': self.longest_chain,
+            'resize_events': list(self.resize_events),
+            'chain_histogram': self.chain_length_histogram(),
+        }
 
     def get_word_counts(self) -> list:
         word_counts = []
@@ -66,35 +220,434 @@ class HashTable:
                 current_node = current_node.next
         return word_counts
 
+    def merge(self, word_counts):
+        """Add the (word, count) pairs of a partial table into this one."""
+        for word, count in word_counts:
+            self.table_insert(word, count)
+
+
+# CompactHashTable class to count words in flat arrays using open addressing
+class CompactHashTable:
+    def __init__(self, size: int = 1024, max_load_factor: float = 0.7):
+        if not 0 < max_load_factor < 1:
+            # Probing stops only at an empty slot, so the table must never fill up
+            raise ValueError(f"max_load_factor must be between 0 and 1, not {max_load_factor}")
+        self.capacity = 1
+        while self.capacity < size:
+            self.capacity *= 2  # Power of two so a slot is found by masking the hash
+        self.max_load_factor = max_load_factor
+        self.max_words = int(self.capacity * max_load_factor)
+        self.num_words = 0
+
+        # Flat typed arrays; unlike NumPy arrays, indexing them yields plain ints with no scalar
+        # object in between, which keeps the per-word probe loop fast
+        self.slots = array.array('i', [-1]) * self.capacity  # Entry index per slot, -1 when empty
+        self.arena = bytearray()  # Every distinct word stored back to back
+        self.key_offsets = array.array('q', [0])  # Word i is arena[offsets[i]:offsets[i+1]]
+        self.counts = array.array('Q')
+        self.hashes = array.array('Q')  # Cached so resizing never rehashes a word
+
+    def table_insert(self, word: str, count: int = 1):
+        key = word.encode()
+        hash_value = word_hash(key)
+        mask = self.capacity - 1
+        slot = hash_value & mask
+        slots = self.slots
+
+        # Linear probing until the word or an empty slot is found
+        while True:
+            entry = slots[slot]
+            if entry < 0:
+                break
+            if self.hashes[entry] == hash_value:
+                offsets = self.key_offsets
+                if self.arena[offsets[entry]:offsets[entry + 1]] == key:
+                    self.counts[entry] += count
+                    return
+            slot = (slot + 1) & mask
+
+        if self.num_words >= self.max_words:
+            self.resize(self.capacity * 2)
+            self.table_insert(word, count)
+            return
+
+        slots[slot] = self.num_words
+        self.arena += key
+        self.key_offsets.append(len(self.arena))
+        self.counts.append(count)
+        self.hashes.append(hash_value)
+        self.num_words += 1
+
+    def resize(self, capacity: int):
+        """Grow the table to `capacity` slots, re-placing every word from its cached hash."""
+        self.capacity = capacity
+        self.max_words = int(capacity * self.max_load_factor)
+
+        mask = capacity - 1
+        slots = [-1] * capacity
+        for entry, hash_value in enumerate(self.hashes):
+            slot = hash_value & mask
+            while slots[slot] >= 0:
+                slot = (slot + 1) & mask
+            slots[slot] = entry
+        self.slots = array.array('i', slots)
 
-# Stack class to manage words in a stack-like data structure
-class Stack:
-    def __init__(self):
-        self.stack = []  # Initialise an empty list to represent the stack
-        self.top: int = -1  # Index of the top element, -1 indicates an empty stack
-        self.STACK_SIZE: int = 50000  # Maximum size of the stack
-
-    def push(self, word):
-        """Push a word onto the stack if there's space."""
-        if self.top < self.STACK_SIZE - 1:
-            self.stack.append(word)  # Add the word to the stack
-            self.top += 1
-        else:
-            raise OverflowError("Stack is full")
-
-    def pop(self):
-        """Pop a word from the stack if it's not empty."""
-        if self.top >= 0:
-            stack_item = self.stack[self.top]  # Get the top element
-            del self.stack[self.top]
-            self.top -= 1  # Update the top index
-            return stack_item  # Return the removed element
+    def get_word_counts(self) -> list:
+        offsets = self.key_offsets
+        arena = self.arena
+        return [(arena[offsets[i]:offsets[i + 1]].decode(), count) for i, count in enumerate(self.counts)]
+
+    def merge(self, word_counts):
+        """Add the (word, count) pairs of a partial table into this one."""
+        for word, count in word_counts:
+            self.table_insert(word, count)
+
+
+# Word-count engines selectable from the command line
+ENGINES = {
+    'chained': HashTable,
+    'compact': CompactHashTable,
+}
+
+
+def split_byte_ranges(filenames: list, range_size: int) -> list:
+    """Split the files into (filename, start, end) byte ranges of roughly `range_size` bytes.
+
+    Every range except the first of a file starts just after a newline, so no word is cut.
+    """
+    ranges = []
+    for filename in filenames:
+        file_size = os.path.getsize(filename)
+        with open(filename, 'rb') as file:
+            start = 0
+            while start < file_size:
+                file.seek(max(start + range_size - 1, start))
+                file.readline()  # Move the cut to the end of the current line
+                end = min(file.tell(), file_size)
+                ranges.append((filename, start, end))
+                start = end
+    return ranges
+
+
+def count_range(job: tuple) -> list:
+    """Count the words in one byte range of a file; runs inside a worker process."""
+    engine, filename, start, end = job
+    hash_table = ENGINES[engine]()
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        for word in tokenize_stream(file, limit=end - start):
+            hash_table.table_insert(word)
+    return hash_table.get_word_counts()
+
+
+def count_words(hash_table, filenames: list, engine: str = 'chained', workers: int = 1) -> dict:
+    """Count the words of every file into `hash_table`, optionally across worker processes.
+
+    Each file is counted up to its size when counting starts. Return the ledger mapping each
+    file's absolute path to the bytes counted.
+    """
+    ledger = {}
+    if workers <= 1:
+        for filename in filenames:
+            file_size = os.path.getsize(filename)
+            with open(filename, 'rb') as file:
+                for word in tokenize_stream(file, limit=file_size):
+                    hash_table.table_insert(word)
+            ledger[os.path.abspath(filename)] = file_size
+        return ledger
+
+    total_size = sum(os.path.getsize(filename) for filename in filenames)
+    range_size = max(MIN_RANGE_SIZE, -(-total_size // (workers * 4)))  # About four ranges per worker
+    jobs = [(engine, filename, start, end) for filename, start, end in split_byte_ranges(filenames, range_size)]
+    for filename in filenames:
+        ledger[os.path.abspath(filename)] = 0
+    for _, filename, _, end in jobs:
+        ledger[os.path.abspath(filename)] = max(ledger[os.path.abspath(filename)], end)
+
+    # Map: count each range in its own table; reduce: merge the partial tables as they finish
+    with multiprocessing.Pool(workers) as pool:
+        for word_counts in pool.imap_unordered(count_range, jobs):
+            hash_table.merge(word_counts)
+    return ledger
+
+
+# Persistent word index: a header, then uint64 key offsets, uint64 counts, the word blob and
+# the ledger of bytes counted from each file, as JSON
+def save_word_index(path: str, word_count_pairs: list, ledger: dict = None):
+    """Write the (word, count) pairs to `path` as a compact binary index sorted by word.
+
+    The ledger is saved in the same file, so the counts and the offsets they cover are always
+    replaced together. Without one, the index cannot be added to incrementally.
+    """
+    keys = sorted((word.encode(), count) for word, count in word_count_pairs)
+    offsets = np.zeros(len(keys) + 1, dtype='<u8')
+    np.cumsum([len(key) for key, _ in keys], out=offsets[1:])
+    counts = np.array([count for _, count in keys], dtype='<u8')
+    blob = b''.join(key for key, _ in keys)
+    ledger_json = json.dumps(ledger, sort_keys=True).encode()
+
+    # Write beside the target and swap it in, so a crash never leaves half an index behind
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(INDEX_MAGIC)
+        file.write(np.array([len(keys), len(blob), len(ledger_json)], dtype='<u8').tobytes())
+        file.write(offsets.tobytes())
+        file.write(counts.tobytes())
+        file.write(blob)
+        file.write(ledger_json)
+    os.replace(temp_path, path)
+
+
+# WordIndex class to answer queries straight from a memory-mapped saved index
+class WordIndex:
+    def __init__(self, path: str):
+        self.data = np.memmap(path, dtype=np.uint8, mode='r')
+        if self.data[:len(INDEX_MAGIC)].tobytes() != INDEX_MAGIC:
+            raise ValueError(f"{path} is not a word index")
+        num_words, blob_size, ledger_size = self.data[len(INDEX_MAGIC):INDEX_HEADER_SIZE].view('<u8').tolist()
+
+        counts_start = INDEX_HEADER_SIZE + 8 * (num_words + 1)
+        blob_start = counts_start + 8 * num_words
+        self.num_words = num_words
+        self.offsets = self.data[INDEX_HEADER_SIZE:counts_start].view('<u8')
+        self.counts = self.data[counts_start:blob_start].view('<u8')
+        self.blob = self.data[blob_start:blob_start + blob_size]
+        ledger_start = blob_start + blob_size
+        # Bytes counted from each file, or None if the index does not know
+        self.ledger = json.loads(self.data[ledger_start:ledger_start + ledger_size].tobytes())
+
+    def __len__(self) -> int:
+        return self.num_words
+
+    def word(self, i: int) -> str:
+        """Return the i-th word in alphabetical order."""
+        return self.key(i).decode()
+
+    def key(self, i: int) -> bytes:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+    def lookup(self, word: str) -> int:
+        """Return the count of `word`, or 0 if it is not in the index, by binary search."""
+        key = word.encode()
+        low, high = 0, self.num_words
+        while low < high:
+            mid = (low + high) // 2
+            if self.key(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self.num_words and self.key(low) == key:
+            return int(self.counts[low])
+        return 0
+
+    def top_k(self, k: int) -> list:
+        """Return the `k` most frequent (word, count) pairs, alphabetical within a count."""
+        if k <= 0 or self.num_words == 0:
+            return []
+        k = min(k, self.num_words)
+        threshold = np.partition(self.counts, self.num_words - k)[self.num_words - k]
+        # Candidates stay in index order, which is alphabetical, so a stable sort keeps ties sorted
+        candidates = np.flatnonzero(self.counts >= threshold)
+        order = candidates[np.argsort(-self.counts[candidates].astype(np.int64), kind='stable')[:k]]
+        return [(self.word(i), int(self.counts[i])) for i in order.tolist()]
+
+    def bottom_k(self, k: int) -> list:
+        """Return the `k` lowest (count, word) pairs, listed from the highest down."""
+        if k <= 0 or self.num_words == 0:
+            return []
+        k = min(k, self.num_words)
+        threshold = np.partition(self.counts, k - 1)[k - 1]
+        candidates = np.flatnonzero(self.counts <= threshold)
+        order = candidates[np.argsort(self.counts[candidates], kind='stable')[:k]]
+        return [(self.word(i), int(self.counts[i])) for i in order.tolist()[::-1]]
+
+    def unique_words(self):
+        """Yield the words that occur exactly once, in alphabetical order."""
+        for i in np.flatnonzero(self.counts == 1).tolist():
+            yield self.word(i)
+
+    def get_word_counts(self):
+        """Yield every (word, count) pair in alphabetical order."""
+        offsets = self.offsets.tolist()
+        for i, count in enumerate(self.counts.tolist()):
+            yield self.blob[offsets[i]:offsets[i + 1]].tobytes().decode(), count
+
+
+# Incremental ingestion of append-only files, tracked by the per-file offset ledger of the index
+def last_line_end(file, start: int, end: int) -> int:
+    """Return the offset just past the last newline in [start, end), or `start` if there is none."""
+    position = end
+    while position > start:
+        block_start = max(start, position - CHUNK_SIZE)
+        file.seek(block_start)
+        newline = file.read(position - block_start).rfind(b'\n')
+        if newline >= 0:
+            return block_start + newline + 1
+        position = block_start
+    return start
+
+
+def count_new_bytes(hash_table, filenames: list, ledger: dict):
+    """Count only the complete lines appended to each file since the ledger's offset.
+
+    A trailing line without its newline is left for the next run, since it may still be being
+    written. A file shorter than its recorded offset was not appended to, so it is skipped.
+    """
+    for filename in filenames:
+        path = os.path.abspath(filename)
+        start = ledger.get(path, 0)
+        file_size = os.path.getsize(filename)
+        if file_size < start:
+            print(f"Warning: The file {filename} is shorter than when last counted; skipping it.", file=sys.stderr)
+            continue
+
+        with open(filename, 'rb') as file:
+            end = last_line_end(file, start, file_size)
+            file.seek(start)
+            for word in tokenize_stream(file, limit=end - start):
+                hash_table.table_insert(word)
+        ledger[path] = end
+
+
+def load_word_index(hash_table, path: str):
+    """Add the counts of a saved index at `path`, if there is one, into `hash_table`.
+
+    Return the index's ledger: empty if there is no index yet, None if it has no ledger.
+    """
+    if not os.path.exists(path):
+        return {}
+    index = WordIndex(path)
+    hash_table.merge(index.get_word_counts())
+    return index.ledger
+
+
+# CountMinSketch class to estimate word counts in a fixed-size table of counters
+class CountMinSketch:
+    def __init__(self, width: int = 1 << 16, depth: int = 4, seed: int = 203):
+        self.bits = max(1, (width - 1).bit_length())  # Width rounded up to a power of two
+        self.width = 1 << self.bits
+        self.depth = depth
+        self.table = np.zeros((depth, self.width), dtype=np.int64)
+        self.total = 0
+        # One random odd multiplier per row for multiply-shift hashing of the 64-bit word hash
+        rng = np.random.default_rng(seed)
+        self.multipliers = [int(value) | 1 for value in rng.integers(0, 1 << 63, depth, dtype=np.uint64)]
+
+    def columns(self, hash_value: int) -> list:
+        shift = 64 - self.bits
+        return [((multiplier * hash_value) & HASH_MASK) >> shift for multiplier in self.multipliers]
+
+    def add(self, hash_value: int, count: int = 1) -> int:
+        """Count `count` occurrences and return the word's new estimate."""
+        self.total += count
+        estimate = None
+        for row, column in enumerate(self.columns(hash_value)):
+            self.table[row, column] += count
+            value = int(self.table[row, column])
+            estimate = value if estimate is None else min(estimate, value)
+        return estimate
+
+    def estimate(self, hash_value: int) -> int:
+        """Return an overestimate of the word's count (never an underestimate)."""
+        return min(int(self.table[row, column]) for row, column in enumerate(self.columns(hash_value)))
+
+    def error_bound(self) -> int:
+        """Return the overestimate bound e * total / width, which holds with probability 1 - e^-depth."""
+        return math.ceil(math.e * self.total / self.width)
+
+
+# SpaceSaving class to track the most frequent words in a bounded min-heap summary
+class SpaceSaving:
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        # Parallel lists form a min-heap on count; positions maps each word to its heap index
+        self.words = []
+        self.counts = []
+        self.errors = []  # Count inherited from the evicted word, the most this one is overestimated
+        self.positions = {}
+
+    def add(self, word: str, count: int = 1):
+        position = self.positions.get(word)
+        if position is not None:
+            self.counts[position] += count
+            self.sift_down(position)
+        elif len(self.words) < self.capacity:
+            self.words.append(word)
+            self.counts.append(count)
+            self.errors.append(0)
+            self.positions[word] = len(self.words) - 1
+            self.sift_up(len(self.words) - 1)
         else:
-            raise IndexError("Stack is empty")  # Notify if the stack is empty
+            # Replace the least frequent word; the newcomer may have been it all along
+            floor = self.counts[0]
+            del self.positions[self.words[0]]
+            self.words[0] = word
+            self.counts[0] = floor + count
+            self.errors[0] = floor
+            self.positions[word] = 0
+            self.sift_down(0)
+
+    def swap(self, i: int, j: int):
+        self.words[i], self.words[j] = self.words[j], self.words[i]
+        self.counts[i], self.counts[j] = self.counts[j], self.counts[i]
+        self.errors[i], self.errors[j] = self.errors[j], self.errors[i]
+        self.positions[self.words[i]] = i
+        self.positions[self.words[j]] = j
+
+    def sift_up(self, index: int):
+        while index > 0:
+            parent = (index - 1) // 2
+            if self.counts[index] >= self.counts[parent]:
+                break
+            self.swap(index, parent)
+            index = parent
+
+    def sift_down(self, index: int):
+        size = len(self.words)
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and self.counts[child + 1] < self.counts[child]:
+                child += 1
+            if self.counts[index] <= self.counts[child]:
+                break
+            self.swap(index, child)
+            index = child
+
+
+# ApproximateCounter class to find heavy hitters in fixed memory, however large the vocabulary
+class ApproximateCounter:
+    def __init__(self, width: int = 1 << 16, depth: int = 4, summary_size: int = 1000):
+        self.sketch = CountMinSketch(width, depth)
+        self.summary = SpaceSaving(summary_size)
+
+    def table_insert(self, word: str, count: int = 1):
+        self.sketch.add(word_hash(word.encode()), count)
+        self.summary.add(word, count)
+
+    def heavy_hitters(self, k: int) -> list:
+        """Return the top `k` (word, estimate, error) triples by estimated count.
+
+        Space-Saving and the sketch both overestimate, so the smaller of their counts is kept.
+        Its error is the gap to the larger of their lower bounds; the sketch's bound holds with
+        probability 1 - e^-depth.
+        """
+        sketch_error = self.sketch.error_bound()
+        candidates = []
+        for word, count, error in zip(self.summary.words, self.summary.counts, self.summary.errors):
+            sketch_count = self.sketch.estimate(word_hash(word.encode()))
+            estimate = min(count, sketch_count)
+            lower_bound = max(count - error, sketch_count - sketch_error, 0)
+            candidates.append((word, estimate, estimate - lower_bound))
+        return top_k(candidates, k, key=lambda triple: (-triple[1], triple[0]))
+
+    def get_word_counts(self) -> list:
+        return [(word, estimate) for word, estimate, _ in self.heavy_hitters(self.summary.capacity)]
 
-    def is_empty(self) -> bool:
-        """Check if the stack is empty."""
-        return self.top == -1  # Return True if the stack is empty.
+    def memory_bytes(self) -> int:
+        """Return the size of the sketch's counter table, which never grows."""
+        return self.sketch.table.nbytes
 
 
 def compare(item1, item2) -> int:
@@ -113,20 +666,33 @@ def compare(item1, item2) -> int:
             return (item2[0] > item1[0]) - (item2[0] < item1[0])  # Compare words alphabetically
 
 
-def alphabetical_compare(item1, item2) -> int:
-    """Compare two words alphabetically."""
-    if item1 < item2:  # Compare words alphabetically
-        return -1  # Item1 comes first alphabetically
-    elif item1 > item2:
-        return 1  # item1 comes later alphabetically
-    else:
-        return 0  # Both words are identical
-
-
 # Heapsort functions
-def siftdown(arr, start, end, m_compare):
-    """Restore the heap property starting from index `start` and ending at index `end`."""
+def siftdown(arr, start, end, m_compare=None):
+    """Restore the heap property starting from index `start` and ending at index `end`.
+
+    With `m_compare` the smallest element is kept at the root. Without it the elements
+    (usually precomputed keys) are compared directly, with no Python-level callback per
+    comparison, and the largest element is kept at the root.
+    """
     root = start
+    if m_compare is None:
+        item = arr[root]  # Carry the root down and write it once at its final position
+        while True:
+            child = 2 * root + 1  # Calculate Left child index
+            if child > end:
+                break
+            child_item = arr[child]
+            if child < end and child_item < arr[child + 1]:
+                child += 1  # Point to the larger child
+                child_item = arr[child]
+            if item < child_item:
+                arr[root] = child_item
+                root = child
+            else:
+                break
+        arr[root] = item
+        return
+
     while True:
         child = 2 * root + 1  # Calculate Left child index
 
@@ -145,7 +711,7 @@ def siftdown(arr, start, end, m_compare):
             break
 
 
-def makeheap(arr, m_compare):
+def makeheap(arr, m_compare=None):
     """Build a heap from an unsorted list."""
     length = len(arr)  # Get the number of elements in the array
     start = (length - 2) // 2  # Last parent node
@@ -154,75 +720,245 @@ def makeheap(arr, m_compare):
         start -= 1  # Move to the previous parent node
 
 
-def heapsort(arr, m_compare):
-    """Sort the list using heapsort algorithm."""
+def heapsort(arr, m_compare=None, key=None):
+    """Sort the list using heapsort algorithm.
+
+    With `m_compare` the list ends in descending order under the comparator. Otherwise it
+    ends in ascending order of `key(item)`, or of the items themselves, like `sorted`.
+    """
+    if key is not None:
+        # Sort keys with the position appended, so equal keys keep their order and items are
+        # never compared; tuple keys are extended rather than nested, which compares faster
+        decorated = []
+        for index, item in enumerate(arr):
+            item_key = key(item)
+            decorated.append(item_key + (index,) if isinstance(item_key, tuple) else (item_key, index))
+        heapsort(decorated)
+        arr[:] = [arr[entry[-1]] for entry in decorated]
+        return
+
     makeheap(arr, m_compare)  # Build the initial heap
     end = len(arr) - 1  # Start with the last parent node
     while end > 0:
-        arr[end], arr[0] = arr[0], arr[end]  # Move the largest element to the end
+        arr[end], arr[0] = arr[0], arr[end]  # Move the root element to the end
         end -= 1
         siftdown(arr, 0, end, m_compare)  # Restore the heap property
 
 
-def process_file():
-    """Process the file to count words, sort them and display results"""
-    print("Please enter the name of the text file: ", end="", file=sys.stderr)
-    filename = sys.stdin.readline().rstrip("\n")
-
-    # Dictionary to store word counts
-    hash_table = HashTable(size=50000)
-
-    ascii_letters = 'abcdefghijklmnopqrstuvwxyz'
-
+def frequency_key(pair) -> tuple:
+    """Key that orders (word, count) pairs the way heapsort orders them with `compare`."""
+    return -pair[1], pair[0]
+
+
+def unique_words_sorted(word_count_pairs):
+    """Yield the words that occur exactly once, in alphabetical order.
+
+    Only the words themselves are collected, and they are sorted in place, so nothing is
+    copied again between sorting and output.
+    """
+    words = [word for word, count in word_count_pairs if count == 1]
+    heapsort(words)
+    yield from words
+
+
+def sort_word_counts(word_count_pairs, backend: str = 'heap') -> list:
+    """Return the pairs sorted by count descending, then alphabetically within each count."""
+    if backend == 'numpy':
+        if not word_count_pairs:
+            return []
+        words = np.array([word for word, _ in word_count_pairs])
+        counts = np.array([count for _, count in word_count_pairs], dtype=np.int64)
+        order = np.lexsort((words, -counts))  # The last key is the primary one
+        return [word_count_pairs[index] for index in order.tolist()]
+    if backend == 'heap':
+        # Words in a table are distinct, so the flat keys alone decide the order
+        keys = [frequency_key(pair) for pair in word_count_pairs]
+        heapsort(keys)
+        return [(word, -negative_count) for negative_count, word in keys]
+    raise ValueError(f"Unknown sort backend: {backend}")
+
+
+# Top-K selection built on the heap primitives
+def top_k(items, k, m_compare=None, key=None) -> list:
+    """Return the first `k` items of the order heapsort produces, in O(n log k).
+
+    A heap of the best `k` items seen so far is kept with the worst of them at the root, so
+    each remaining item costs one comparison unless it displaces the root.
+    """
+    if k <= 0:
+        return []
+    heap = []
+
+    if m_compare is None:
+        for index, item in enumerate(items):
+            entry = (item if key is None else key(item), index, item)
+            if len(heap) < k:
+                heap.append(entry)
+                if len(heap) == k:
+                    makeheap(heap)
+            elif entry < heap[0]:
+                heap[0] = entry
+                siftdown(heap, 0, k - 1)
+        heapsort(heap)
+        return [item for _, _, item in heap]
+
+    for item in items:
+        if len(heap) < k:
+            heap.append(item)
+            if len(heap) == k:
+                makeheap(heap, m_compare)
+        elif m_compare(item, heap[0]) > 0:
+            heap[0] = item
+            siftdown(heap, 0, k - 1, m_compare)
+    heapsort(heap, m_compare)
+    return heap
+
+
+def bottom_k(items, k, key=None) -> list:
+    """Return the `k` smallest items by `key(item)` (or by the items), listed from the highest down."""
+    lowest = top_k(items, k, key=key)  # top_k orders ascending by key, so it keeps the smallest
+    lowest.reverse()
+    return lowest
+
+
+def process_approximate(filenames: list, width: int, depth: int, summary_size: int, report: Report):
+    """Report the top 10 words of the files with estimated counts and error bounds."""
+    counter = ApproximateCounter(width, depth, summary_size)
     try:
-        # Reading file line by line
-        with open(filename, 'r', encoding='utf-8') as file:
-            for line in file:
-                line = line.lower()
-                line_words = line.split()
-
-                for word in line_words:
-                    word = ''.join(char for char in word if char in ascii_letters)
-                    if word:
-                        hash_table.table_insert(word)
-
-    except FileNotFoundError:
-        print(f"Error: The file {filename} is not found.", file=sys.stderr)
+        for filename in filenames:
+            with open(filename, 'rb') as file:
+                for word in tokenize_stream(file):
+                    counter.table_insert(word)
+    except FileNotFoundError as error:
+        print(f"Error: The file {error.filename} is not found.", file=sys.stderr)
     except UnicodeDecodeError:
-        print(f"Error: The file {filename} is not UTF-8 encoded.", file=sys.stderr)
-
-    word_count_pairs = hash_table.get_word_counts()
-    heapsort(word_count_pairs, compare)
-
-    print("Top 10 words by frequency:")
-    for word, count in word_count_pairs[:10]:
-        print(f"The word: {word} occurs {count} times.", end="\n")
-
-    last_10_words = sorted(
-        [(word, count) for word, count in word_count_pairs if count in [pair[1] for pair in word_count_pairs[-10:]]],
-        key=lambda x: (x[1], x[0]),
-        reverse=True
-    )[-10:]
-
-    print("\nLast 10 words sorted alphabetically within frequency:")
-    for word, count in last_10_words:
-        print(f"The word: {word} occurs {count} times.")
-
-    unique_words_list = [(word, 1) for word, count in word_count_pairs if count == 1]
-    heapsort(unique_words_list, alphabetical_compare)
-
-    try:
-        unique_words = Stack()
-        for word, count in unique_words_list:
-            unique_words.push((word, count))
-
-        print("\nUnique words sorted alphabetically:")
-        while not unique_words.is_empty():
-            word = unique_words.pop()
-            print(f"The word: {word[0]} occurs {word[1]} time.")
-    except (IndexError, OverflowError) as error:
-        print(error)
+        print(f"Error: The file {', '.join(filenames)} is not UTF-8 encoded.", file=sys.stderr)
+
+    report.table('top_10', ('word', 'estimate', 'error'), counter.heavy_hitters(10),
+                 line="The word: {} occurs {} times (error at most {}).",
+                 title="Top 10 words by frequency (approximate):")
+
+
+def process_file(engine: str = 'chained', workers: int = 1, filenames: list = None,
+                 save_index: str = None, load_index: str = None, incremental: str = None,
+                 approximate: bool = False, sketch_width: int = 1 << 16, sketch_depth: int = 4,
+                 summary_size: int = 1000, output_format: str = 'text'):
+    """Process the files to count words, sort them and display results"""
+    with Report(output_format) as report:
+        return report_words(report, engine, workers, filenames, save_index, load_index, incremental,
+                            approximate, sketch_width, sketch_depth, summary_size)
+
+
+def report_words(report: Report, engine, workers, filenames, save_index, load_index, incremental,
+                 approximate, sketch_width, sketch_depth, summary_size):
+    """Count the words as process_file describes and record the results in the report."""
+    if approximate:
+        if not filenames:
+            print("Please enter the name of the text file: ", end="", file=sys.stderr)
+            filenames = [sys.stdin.readline().rstrip("\n")]
+        return process_approximate(filenames, sketch_width, sketch_depth, summary_size, report)
+
+    if load_index:
+        # Answer the report straight from a saved index instead of reading any text
+        try:
+            index = WordIndex(load_index)
+        except FileNotFoundError:
+            print(f"Error: The file {load_index} is not found.", file=sys.stderr)
+            return 1
+        except ValueError as error:
+            print(f"Error: {error}.", file=sys.stderr)
+            return 1
+        top_10_words = index.top_k(10)
+        last_10_words = index.bottom_k(10)
+        unique_words = index.unique_words()
+    else:
+        if not filenames:
+            print("Please enter the name of the text file: ", end="", file=sys.stderr)
+            filenames = [sys.stdin.readline().rstrip("\n")]
+
+        # Dictionary to store word counts
+        hash_table = ENGINES[engine]()
+        ledger = None  # Bytes counted from each file, known only if counting succeeds
+        failed = False
+
+        try:
+            if incremental:
+                # Start from the saved counts and read only what was appended since
+                try:
+                    ledger = load_word_index(hash_table, incremental)
+                except ValueError as error:
+                    print(f"Error: {error}.", file=sys.stderr)
+                    return 1
+                if ledger is None:
+                    print(f"Error: The index {incremental} does not record which bytes it has counted.",
+                          file=sys.stderr)
+                    return 1
+                count_new_bytes(hash_table, filenames, ledger)
+            else:
+                # Reading files in large binary chunks
+                ledger = count_words(hash_table, filenames, engine, workers)
+
+        except FileNotFoundError as error:
+            print(f"Error: The file {error.filename} is not found.", file=sys.stderr)
+            failed = True
+        except UnicodeDecodeError:
+            print(f"Error: The file {', '.join(filenames)} is not UTF-8 encoded.", file=sys.stderr)
+            failed = True
+
+        word_count_pairs = hash_table.get_word_counts()
+        if save_index:
+            # After a failure it is unknown how much of each file was counted
+            save_word_index(save_index, word_count_pairs, None if failed else ledger)
+        if incremental and not failed:
+            # The counts and the ledger live in one file, so one swap commits both
+            save_word_index(incremental, word_count_pairs, ledger)
+
+        top_10_words = top_k(word_count_pairs, 10, key=frequency_key)
+
+        # The ten lowest (count, word) pairs, listed from the highest down
+        last_10_words = bottom_k(word_count_pairs, 10, key=lambda pair: (pair[1], pair[0]))
+
+        unique_words = unique_words_sorted(word_count_pairs)
+
+    report.table('top_10', ('word', 'count'), top_10_words,
+                 line="The word: {} occurs {} times.", title="Top 10 words by frequency:")
+    report.table('last_10', ('word', 'count'), last_10_words,
+                 line="The word: {} occurs {} times.",
+                 title="\nLast 10 words sorted alphabetically within frequency:")
+
+    # Stream the unique words straight into the buffered report, however many there are
+    report.table('unique_words', ('word', 'count'), ((word, 1) for word in unique_words),
+                 line="The word: {} occurs {} time.", title="\nUnique words sorted alphabetically:")
 
 
 if __name__ == '__main__':
-    sys.exit(process_file())
+    parser = argparse.ArgumentParser(description="Count the words in a text file and report their frequencies.")
+    parser.add_argument('filenames', nargs='*',
+                        help="text files to count (prompted for on stdin when omitted)")
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='chained',
+                        help="word-count table to use (default: chained)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of worker processes counting in parallel (default: 1)")
+    parser.add_argument('--save-index', metavar='PATH',
+                        help="also save the word counts as a binary index at PATH")
+    parser.add_argument('--load-index', metavar='PATH',
+                        help="report from a saved index instead of reading text files")
+    parser.add_argument('--incremental', metavar='PATH',
+                        help="add only text appended since the last run to the index at PATH, "
+                             "tracking offsets in the index itself")
+    parser.add_argument('--approximate', action='store_true',
+                        help="estimate the top 10 in fixed memory with a Count-Min Sketch and Space-Saving summary")
+    parser.add_argument('--sketch-width', type=int, default=1 << 16,
+                        help="counters per sketch row in approximate mode (default: 65536)")
+    parser.add_argument('--sketch-depth', type=int, default=4,
+                        help="sketch rows in approximate mode (default: 4)")
+    parser.add_argument('--summary-size', type=int, default=1000,
+                        help="words tracked by the Space-Saving summary in approximate mode (default: 1000)")
+    parser.add_argument('--format', choices=FORMATS, default='text',
+                        help="output format (default: text)")
+    args = parser.parse_args()
+    sys.exit(process_file(engine=args.engine, workers=args.workers, filenames=args.filenames,
+                          save_index=args.save_index, load_index=args.load_index,
+                          incremental=args.incremental, approximate=args.approximate,
+                          sketch_width=args.sketch_width, sketch_depth=args.sketch_depth,
+                          summary_size=args.summary_size, output_format=args.format))
@@ -0,0 +1,74 @@
+import argparse
+import os
+import sys
+
+# The shared tooling lives one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bench
+
+import main
+
+SAMPLE_FILES = ['sample-short.txt', 'sample-long.txt', 'sample-long-long.txt']
+COLUMNS = [
+    ('file', 'file', '{}'),
+    ('words', 'words', '{:,}'),
+    ('distinct', 'distinct', '{:,}'),
+    ('top-k recall', 'recall', '{:.0%}'),
+    ('max error', 'max_error', '{:,}'),
+    ('mean error', 'mean_error', '{:,.1f}'),
+    ('bounds held', 'bounds_held', '{}'),
+    ('sketch bytes', 'sketch_bytes', '{:,}'),
+]
+
+
+def verify(path: str, width: int, depth: int, summary_size: int, k: int) -> dict:
+    """Compare the approximate top `k` of one file against its exact word counts."""
+    exact = main.HashTable()
+    approximate = main.ApproximateCounter(width, depth, summary_size)
+    with open(path, 'rb') as file:
+        for word in main.tokenize_stream(file):
+            exact.table_insert(word)
+            approximate.table_insert(word)
+
+    counts = dict(exact.get_word_counts())
+    true_top = {word for word, _ in main.top_k(list(counts.items()), k, key=main.frequency_key)}
+    hitters = approximate.heavy_hitters(k)
+    errors = [estimate - counts.get(word, 0) for word, estimate, _ in hitters]
+    covered = sum(1 for (word, estimate, bound), error in zip(hitters, errors) if 0 <= error <= bound)
+
+    return {
+        'file': os.path.basename(path),
+        'words': approximate.sketch.total,
+        'distinct': len(counts),
+        'recall': len(true_top & {word for word, _, _ in hitters}) / len(true_top) if true_top else 1.0,
+        'max_error': max(errors, default=0),
+        'mean_error': sum(errors) / len(errors) if errors else 0.0,
+        'bounds_held': f'{covered}/{len(hitters)}',
+        'sketch_bytes': approximate.memory_bytes(),
+    }
+
+
+def main_verify():
+    """Measure the approximate counter's error against exact counts on sample files."""
+    parser = argparse.ArgumentParser(description="Check the approximate heavy hitters against exact counts.")
+    parser.add_argument('files', nargs='*', default=SAMPLE_FILES,
+                        help="text files to check (default: the bundled samples)")
+    parser.add_argument('--sketch-width', type=int, default=1 << 16, help="counters per sketch row (default: 65536)")
+    parser.add_argument('--sketch-depth', type=int, default=4, help="sketch rows (default: 4)")
+    parser.add_argument('--summary-size', type=int, default=1000, help="words tracked by Space-Saving (default: 1000)")
+    parser.add_argument('-k', type=int, default=10, help="number of heavy hitters to check (default: 10)")
+    parser.add_argument('--format', choices=bench.FORMATS, default='table', help="output format (default: table)")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for filename in args.files:
+        path = filename if os.path.exists(filename) else os.path.join(here, filename)
+        results.append(verify(path, args.sketch_width, args.sketch_depth, args.summary_size, args.k))
+
+    bench.print_results(results, COLUMNS, args.format)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_verify())
@@ -0,0 +1,77 @@
+import argparse
+import os
+import sys
+from timeit import default_timer
+
+# The shared tooling lives one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bench
+
+import main
+import workload
+from report import Report
+
+COLUMNS = [
+    ('tellers', 'tellers', '{:,}'),
+    ('customers', 'customers', '{:,}'),
+    ('service', 'service', '{}'),
+    ('events', 'events', '{:,}'),
+    ('run s', 'run_s', '{:,.2f}'),
+    ('events/s', 'events_per_s', '{:,.0f}'),
+    ('max queue', 'max_queue_length', '{:,}'),
+    ('peak RSS KiB', 'peak_rss_kib', '{:,}'),
+]
+
+
+def measure(job: dict) -> dict:
+    """Simulate one generated workload; runs in a fresh process so peak RSS is its own."""
+    arrivals = workload.generate_arrivals(job['customers'], job['tellers'], job['load'], job['mean_service'],
+                                          job['service'], job['priorities'], job['seed'])
+    with open(os.devnull, 'w') as devnull:
+        simulation = main.BankSimulation(job['tellers'], Report('text', devnull))
+        start = default_timer()
+        simulation.run(arrivals)
+        elapsed = default_timer() - start
+
+    # Every customer is one arrival event and, once a teller takes them, one completion event
+    served = sum(simulation.customers_served.get(i) for i in range(job['tellers']))
+    events = job['customers'] + served
+    return {
+        'tellers': job['tellers'],
+        'customers': job['customers'],
+        'service': job['service'],
+        'events': events,
+        'run_s': elapsed,
+        'events_per_s': events / elapsed if elapsed > 0 else float('inf'),
+        'max_queue_length': simulation.max_queue_length,
+        'peak_rss_kib': bench.peak_rss_kib(),
+    }
+
+
+def main_benchmark():
+    """Time the simulation on generated workloads across teller counts and trace lengths."""
+    parser = argparse.ArgumentParser(description="Measure how the bank simulation scales.")
+    parser.add_argument('--tellers', type=int, nargs='+', default=[1, 2, 4, 64, 1024],
+                        help="teller counts to simulate (default: 1 2 4 64 1024)")
+    parser.add_argument('--customers', type=int, nargs='+', default=[1000, 100000],
+                        help="customers per trace, up to 10000000 (default: 1000 100000)")
+    parser.add_argument('--load', type=float, default=0.9,
+                        help="fraction of the time the tellers are busy on average (default: 0.9)")
+    parser.add_argument('--mean-service', type=float, default=10.0, help="mean service time (default: 10)")
+    parser.add_argument('--service', choices=workload.SERVICE_DISTRIBUTIONS, default='exponential',
+                        help="service time distribution (default: exponential)")
+    parser.add_argument('--priorities', type=float, nargs='+', default=[1.0, 1.0, 1.0],
+                        help="relative weight of priority 1, 2, ... (default: 1 1 1)")
+    parser.add_argument('--seed', type=int, default=203, help="random seed for the workloads (default: 203)")
+    parser.add_argument('--format', choices=bench.FORMATS, default='table', help="output format (default: table)")
+    args = parser.parse_args()
+
+    jobs = [{'customers': customers, 'tellers': tellers, 'load': args.load, 'mean_service': args.mean_service,
+             'service': args.service, 'priorities': args.priorities, 'seed': args.seed}
+            for customers in args.customers for tellers in args.tellers]
+    bench.print_results(bench.run_isolated(measure, jobs), COLUMNS, args.format)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_benchmark())
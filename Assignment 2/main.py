@@ -1,150 +1,319 @@
+import argparse
+import io
+import math
+import os
+import re
+import sys
+
+import numpy as np
+
+# The report writer is shared by all three assignments and lives one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from report import FORMATS, Report
+except ImportError:
+    # Outside the full checkout there is no report.py; print the text report as it is made
+    FORMATS = ['text']
+
+    class Report:
+        def __init__(self, output_format='text'):
+            self.format = output_format
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            self.flush()
+
+        def flush(self):
+            sys.stdout.flush()
+
+        def line(self, text=''):
+            print(text)
+
+        def note(self, text):
+            print(text)
+
+        def field(self, name, value, text=None):
+            if text is not None:
+                print(text)
+
+        def table(self, name, columns, rows, line=None, title=None):
+            if title is not None:
+                print(title)
+            if line is not None:
+                for row in rows:
+                    print(line.format(*row))
+
+DELETED = object()  # Marks a removed key, so probe sequences running past it are not cut short
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15  # 2^64 / golden ratio, for Fibonacci hashing
+HASH_MASK = (1 << 64) - 1
+CHUNK_SIZE = 1 << 20  # Characters of an arrivals file parsed at a time
+# The "0 0" line that ends an arrivals file: arrival and service time both zero
+SENTINEL_PATTERN = re.compile(r'^[ \t]*[+-]?(?:0+\.?0*|\.0+)[ \t]+[+-]?(?:0+\.?0*|\.0+)(?:[ \t]|$)', re.MULTILINE)
+
 class HashTable:
-    def __init__(self, size=100):
-        self.size = size
-        self.table = [None] * self.size
+    def __init__(self, size=128, max_load_factor=0.7):
+        if not 0 < max_load_factor < 1:
+            # Probing stops only at an empty slot, so the table must never fill up
+            raise ValueError(f"max_load_factor must be between 0 and 1, not {max_load_factor}")
+        self.bits = max(1, (size - 1).bit_length())  # Capacity rounded up to a power of two
+        self.size = 1 << self.bits
+        self.max_load_factor = max_load_factor
+        self.count = 0  # Live keys
+        self.used = 0  # Live keys plus tombstones
+        self.table_keys = [None] * self.size
+        self.table_values = [None] * self.size
 
     def _hash(self, key):
-        return key % self.size
-
-    def _probe(self, hashed_key):
-        original_hashed_key = hashed_key
-        while self.table[hashed_key] is not None and self.table[hashed_key][0] is not None:
-            hashed_key = (hashed_key + 1) % self.size
-            if hashed_key == original_hashed_key:
-                raise Exception("Hash table is full")
-        return hashed_key
+        # Multiply-shift mixes every bit of the key into the top bits used as the slot
+        return ((hash(key) * HASH_MULTIPLIER) & HASH_MASK) >> (64 - self.bits)
+
+    def _find(self, key):
+        # Return the slot holding key, or None
+        mask = self.size - 1
+        keys = self.table_keys
+        slot = self._hash(key)
+        while keys[slot] is not None:
+            if keys[slot] is not DELETED and keys[slot] == key:
+                return slot
+            slot = (slot + 1) & mask
+        return None
 
     def insert(self, key, value):
-        hashed_key = self._hash(key)
-        if self.table[hashed_key] is None:
-            self.table[hashed_key] = (key, value)
+        mask = self.size - 1
+        keys = self.table_keys
+        slot = self._hash(key)
+        tombstone = None  # First removed slot on the way, reused for a new key
+        while keys[slot] is not None:
+            if keys[slot] is DELETED:
+                if tombstone is None:
+                    tombstone = slot
+            elif keys[slot] == key:
+                self.table_values[slot] = value
+                return
+            slot = (slot + 1) & mask
+
+        if tombstone is not None:
+            slot = tombstone
         else:
-            hashed_key = self._probe(hashed_key)
-            self.table[hashed_key] = (key, value)
+            self.used += 1
+        keys[slot] = key
+        self.table_values[slot] = value
+        self.count += 1
+        if self.used > self.max_load_factor * self.size:
+            # Grow when live keys fill the table; otherwise rebuilding just clears the tombstones
+            self._resize(self.size * 2 if self.count > self.max_load_factor * self.size / 2 else self.size)
+
+    def _resize(self, size):
+        old_keys, old_values = self.table_keys, self.table_values
+        self.bits = size.bit_length() - 1
+        self.size = size
+        self.count = 0
+        self.used = 0
+        self.table_keys = [None] * size
+        self.table_values = [None] * size
+        for key, value in zip(old_keys, old_values):
+            if key is not None and key is not DELETED:
+                self.insert(key, value)
 
     def get(self, key):
-        hashed_key = self._hash(key)
-        probing_attempts = 0
-        while probing_attempts < self.size:
-            if self.table[hashed_key] is None:
-                return None
-            elif self.table[hashed_key][0] == key:
-                return self.table[hashed_key][1]
-            hashed_key = (hashed_key + 1) % self.size
-            probing_attempts += 1
-        return None
+        slot = self._find(key)
+        return self.table_values[slot] if slot is not None else None
 
     def update(self, key, value):
-        hashed_key = self._hash(key)
-        probing_attempts = 0
-        while probing_attempts < self.size:
-            if self.table[hashed_key] is None:
-                return False
-            elif self.table[hashed_key][0] == key:
-                self.table[hashed_key] = (key, value)
-                return True
-            hashed_key = (hashed_key + 1) % self.size
-            probing_attempts += 1
-        return False
+        slot = self._find(key)
+        if slot is None:
+            return False
+        self.table_values[slot] = value
+        return True
+
+    def delete(self, key):
+        slot = self._find(key)
+        if slot is None:
+            return False
+        self.table_keys[slot] = DELETED
+        self.table_values[slot] = None
+        self.count -= 1
+        return True
 
     def keys(self):
-        return [entry[0] for entry in self.table if entry is not None]
+        return [key for key in self.table_keys if key is not None and key is not DELETED]
 
 class Customer:
+    __slots__ = ("arrival_time", "service_time", "priority")
+
     def __init__(self, arrival_time, service_time, priority):
         self.arrival_time = arrival_time
         self.service_time = service_time
         self.priority = priority
 
-    def __lt__(self, other):
-        # Prioritise based on arrival time if same priority
-        if self.priority == other.priority:
-            return self.arrival_time < other.arrival_time
-        # Prioritise higher-priority customers
-        return self.priority > other.priority
-
 class MinHeap:
     def __init__(self):
         self.heap = []
-
-    def parent(self, i):
-        return (i - 1) // 2
-
-    def left_child(self, i):
-        return 2 * i + 1
-
-    def right_child(self, i):
-        return 2 * i + 2
+        self.size = 0  # Number of elements, kept up to date instead of counted
 
     def insert(self, element):
         self.heap.append(element)
-        self._heapify_up(self._get_length(self.heap) - 1)
+        self.size += 1
+        self._heapify_up(self.size - 1)
+
+    def heapify(self, elements):
+        # Add many elements at once, restoring the heap in one bottom-up pass
+        self.heap.extend(elements)
+        self.size = len(self.heap)
+        for index in range(self.size // 2 - 1, -1, -1):
+            self._heapify_down(index)
 
     def _heapify_up(self, index):
-        while index != 0 and self.heap[self.parent(index)] > self.heap[index]:
-            self.heap[index], self.heap[self.parent(index)] = self.heap[self.parent(index)], self.heap[index]
-            index = self.parent(index)
+        # Move the parents down and write the element once, at its final position
+        heap = self.heap
+        element = heap[index]
+        while index > 0:
+            parent = (index - 1) // 2
+            if not element < heap[parent]:
+                break
+            heap[index] = heap[parent]
+            index = parent
+        heap[index] = element
 
     def extract_min(self):
-        if self._get_length(self.heap) == 0:
+        if self.size == 0:
             return None
         root = self.heap[0]
         last_element = self.heap.pop()
-        if self._get_length(self.heap) > 0:
+        self.size -= 1
+        if self.size > 0:
             self.heap[0] = last_element
             self._heapify_down(0)
         return root
 
     def _heapify_down(self, index):
-        smallest = index
-        left = self.left_child(index)
-        right = self.right_child(index)
-
-        if left < self._get_length(self.heap) and self.heap[left] < self.heap[smallest]:
-            smallest = left
-
-        if right < self._get_length(self.heap) and self.heap[right] < self.heap[smallest]:
-            smallest = right
-
-        if smallest != index:
-            self.heap[index], self.heap[smallest] = self.heap[smallest], self.heap[index]
-            self._heapify_down(smallest)
+        heap = self.heap
+        size = self.size
+        element = heap[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1  # The smaller child
+            if not heap[child] < element:
+                break
+            heap[index] = heap[child]
+            index = child
+        heap[index] = element
 
     def is_empty(self):
-        return self._get_length(self.heap) == 0
-
-    @staticmethod
-    def _get_length(lst):
-        count = 0
-        for _ in lst:
-            count += 1
-        return count
+        return self.size == 0
 
 class Queue:
     def __init__(self):
+        # Customers are stored as (-priority, arrival_time, seq, customer) so the heap compares
+        # plain tuples; seq is unique, so equal customers leave first come, first served
         self.queue = MinHeap()
+        self.seq = 0
 
     def enqueue(self, customer):
-        self.queue.insert(customer)
+        self.queue.insert((-customer.priority, customer.arrival_time, self.seq, customer))
+        self.seq += 1
 
     def dequeue(self):
-        return self.queue.extract_min()
+        entry = self.queue.extract_min()
+        return entry[3] if entry is not None else None
 
     def is_empty(self):
         return self.queue.is_empty()
 
-class BankSimulation:
+    def length(self):
+        return self.queue.size
+
+def parse_arrivals(text):
+    # Parse lines of "arrival_time service_time priority" into an (n, 3) array with NumPy;
+    # fields may be separated by any spaces or tabs
+    rows = None
+    if text.strip():
+        try:
+            rows = np.loadtxt(io.StringIO(text), dtype=np.float64, ndmin=2)
+        except ValueError:
+            pass  # Some line is malformed
+    if rows is None or rows.shape[1] != 3:
+        # Slow path: parse line by line, skipping any line that is not three numbers
+        values = []
+        for line in text.splitlines():
+            fields = line.split()
+            if len(fields) == 3:
+                try:
+                    values.append([float(field) for field in fields])
+                except ValueError:
+                    pass
+        rows = np.array(values, dtype=np.float64).reshape(-1, 3)
+    return rows
+
+def read_arrivals(file, chunk_size=CHUNK_SIZE):
+    # Yield [arrival_time, service_time, priority] for each customer of an open arrivals file,
+    # up to the "0 0" line. The file is parsed a chunk of whole lines at a time, so only one
+    # chunk is ever held in memory, however long the file or pipe is
+    carry = ""  # Start of a line cut off at the end of the last chunk
+    while True:
+        chunk = file.read(chunk_size)
+        text = carry + chunk
+        carry = ""
+        if chunk:
+            cut = text.rfind("\n") + 1
+            text, carry = text[:cut], text[cut:]
+        sentinel = SENTINEL_PATTERN.search(text)
+        if sentinel is not None:
+            text = text[:sentinel.start()]
+        yield from parse_arrivals(text).tolist()
+        if sentinel is not None or not chunk:
+            return
+
+class TellerPool:
+    # Idle tellers, handed out in round-robin order: the first idle teller at or after the one
+    # following the last teller handed out, wrapping around, just as a scan would find
     def __init__(self, num_tellers):
         self.num_tellers = num_tellers
+        self.next_teller = 0
+        self.ahead = MinHeap()  # Idle tellers numbered next_teller or above
+        self.behind = MinHeap()  # Idle tellers numbered below next_teller
+        self.ahead.heapify(range(num_tellers))
+
+    def acquire(self):
+        if self.ahead.is_empty():
+            # Wrap around: every idle teller now comes after the cursor
+            self.ahead, self.behind = self.behind, self.ahead
+        teller_id = self.ahead.extract_min()
+        if teller_id is None:
+            return None
+        self.next_teller = teller_id + 1
+        if self.next_teller == self.num_tellers:
+            self.next_teller = 0
+            self.ahead, self.behind = self.behind, self.ahead
+        return teller_id
+
+    def release(self, teller_id):
+        if teller_id >= self.next_teller:
+            self.ahead.insert(teller_id)
+        else:
+            self.behind.insert(teller_id)
+
+class BankSimulation:
+    def __init__(self, num_tellers, report=None):
+        self.num_tellers = num_tellers
+        self.report = report if report is not None else Report()
         self.tellers = HashTable()
         self.queue = Queue()
+        self.completions = MinHeap()  # (finish_time, teller_id) of every busy teller
         self.time = 0
         self.max_queue_length = 0
         self.total_queue_time = 0
+        self.queue_area = 0  # Queue length integrated over time up to queue_changed_at
+        self.queue_changed_at = 0
         self.total_idle_time = HashTable()
         self.customers_served = HashTable()
         self.last_busy_time = HashTable()
-        self.round_robin_counter = 0  # Round-robin counter to keep track of the starting point
+        self.idle_tellers = TellerPool(num_tellers)
 
         for i in range(self.num_tellers):
             self.tellers.insert(i, None)
@@ -152,40 +321,22 @@ class BankSimulation:
             self.customers_served.insert(i, 0)
             self.last_busy_time.insert(i, 0)
 
-    def read_file(self, filename):
-        customers = []
-        with open(filename, 'r') as file:
-            for line in file:
-                try:
-                    arrival_time, service_time, priority = self._parse_line(line.strip())
-                    if arrival_time == 0 and service_time == 0:
-                        break
-                    customers.append(Customer(arrival_time, service_time, priority))
-                except ValueError as e:
-                    pass
-        return customers
-
-    def _parse_line(self, line):
-        values = []
-        value = ""
-        for char in line:
-            if char == ' ':
-                values.append(float(value))
-                value = ""
-            else:
-                value += char
-
-        values.append(float(value))
-        return values
+    def run(self, arrivals):
+        # arrivals is the name of an arrivals file, or any iterable of (arrival_time, service_time,
+        # priority) in arrival order; either is consumed lazily, one customer at a time
+        if isinstance(arrivals, (str, os.PathLike)):
+            with open(arrivals, 'r') as file:
+                return self.run(read_arrivals(file))
 
-    def run(self, filename):
-        customers = self.read_file(filename)
-        for customer in customers:
-            self.time = customer.arrival_time
-            self.allocate_customer(customer)
+        for arrival_time, service_time, priority in arrivals:
+            self.time = arrival_time
+            self.allocate_customer(Customer(arrival_time, service_time, priority))
             self.update_tellers()
 
-        while not self.queue.is_empty():
+        # The clock still moves in whole ticks, but jumps straight to the next tick on which a
+        # teller finishes instead of visiting every tick in between
+        while not self.queue.is_empty() and not self.completions.is_empty():
+            self.advance_clock(self.completions.heap[0][0])
             self.update_tellers()
             self.time += 1
 
@@ -194,39 +345,54 @@ class BankSimulation:
     def allocate_customer(self, customer):
         teller_id = self.find_idle_teller()
         if teller_id is not None:
-            self.tellers.update(teller_id, (customer, self.time + customer.service_time))
-            self.update_customers_served(teller_id)
+            self.assign(teller_id, customer)
         else:
+            self.record_queue_change()
             self.queue.enqueue(customer)
             self.update_queue_length()
 
+    def assign(self, teller_id, customer):
+        finish_time = self.time + customer.service_time
+        self.tellers.update(teller_id, (customer, finish_time))
+        self.completions.insert((finish_time, teller_id))
+        self.update_customers_served(teller_id)
+
     def update_tellers(self):
-        for i in self.tellers.keys():
-            teller_status = self.tellers.get(i)
-            if teller_status is not None:
-                customer, finish_time = teller_status
-                if self.time >= finish_time:
-                    # Teller becomes idle
-                    self.tellers.update(i, None)
-                    # Update idle time for the teller
-                    self.update_total_idle_time(i)
-
-                    # Process the next customer in the queue if available
-                    if not self.queue.is_empty():
-                        next_customer = self.queue.dequeue()
-                        self.tellers.update(i, (next_customer, self.time + next_customer.service_time))
-                        self.update_customers_served(i)
-                    self.last_busy_time.update(i, self.time)  # Update last busy time
+        # Only the tellers whose service has finished are visited, in teller order as before
+        finished = []
+        while not self.completions.is_empty() and self.completions.heap[0][0] <= self.time:
+            finished.append(self.completions.extract_min()[1])
+        finished.sort()
+
+        for i in finished:
+            # Teller becomes idle
+            self.tellers.update(i, None)
+            # Update idle time for the teller
+            self.update_total_idle_time(i)
+
+            # Process the next customer in the queue if available
+            if not self.queue.is_empty():
+                self.record_queue_change()
+                self.assign(i, self.queue.dequeue())
+            else:
+                self.idle_tellers.release(i)
+            self.last_busy_time.update(i, self.time)  # Update last busy time
+
+    def advance_clock(self, target):
+        # Add whole ticks until the clock reaches target, giving the very value that repeated
+        # `time += 1` would: within one binade every addition is exact, so the ticks up to its
+        # end are added at once and the binade boundary is crossed one tick at a time
+        time = self.time
+        while time < target:
+            limit = min(target, 2.0 ** math.frexp(time)[1])
+            jump = math.floor(limit - time) - 1
+            if jump > 0:
+                time += jump
+            time += 1
+        self.time = time
 
     def find_idle_teller(self):
-        start_index = self.round_robin_counter
-        for index in range(self.num_tellers):
-            teller_id = (start_index + index) % self.num_tellers
-            if self.tellers.get(teller_id) is None:
-                # Update round_robin_counter for next allocation
-                self.round_robin_counter = (teller_id + 1) % self.num_tellers
-                return teller_id
-        return None
+        return self.idle_tellers.acquire()
 
     def update_queue_length(self):
         current_length = self._get_queue_length()
@@ -235,11 +401,16 @@ class BankSimulation:
         self.total_queue_time += current_length
 
     def _get_queue_length(self):
-        # Implement the manual count instead of len()
-        count = 0
-        for _ in self.queue.queue.heap:
-            count += 1
-        return count
+        return self.queue.length()
+
+    def record_queue_change(self):
+        # Called just before the queue grows or shrinks, to add the time spent at its old length
+        self.queue_area += self._get_queue_length() * (self.time - self.queue_changed_at)
+        self.queue_changed_at = self.time
+
+    def time_weighted_queue_length(self):
+        area = self.queue_area + self._get_queue_length() * (self.time - self.queue_changed_at)
+        return area / self.time if self.time > 0 else 0
 
     def update_customers_served(self, teller_id):
         served = self.customers_served.get(teller_id)
@@ -254,14 +425,14 @@ class BankSimulation:
 
         else:
             # If the teller has not been busy, we cannot calculate idle time correctl
-            print(f"Teller {teller_id} not found in total_idle_time or has not been idle")
+            self.report.note(f"Teller {teller_id} not found in total_idle_time or has not been idle")
 
     def print_statistics(self):
         total_service_time = 0
         total_waiting_time = 0
         num_customers_served = 0
 
-        for index in self.tellers.keys():
+        for index in range(self.num_tellers):
             entry = self.tellers.get(index)
             if entry is not None:
                 customer, finish_time = entry
@@ -273,30 +444,50 @@ class BankSimulation:
         avg_service_time_per_customer = (total_service_time / num_customers_served) if num_customers_served > 0 else 0
         avg_waiting_time_per_customer = (total_waiting_time / num_customers_served) if num_customers_served > 0 else 0
 
-        print("Simulation Statistics")
-        print("Customers Served by Each Teller")
-        for i in self.tellers.keys():
-            print(f"Teller [{i}]: {self.customers_served.get(i)}")
-
-        print(f"Total Time of Simulation: {self.time:.2f}")
-        print(f"Average Service Time per Customer: {avg_service_time_per_customer:.4f}")
-        print(f"Average Waiting Time per Customer: {avg_waiting_time_per_customer:.3f}")
-        print(f"Maximum Length of the Queue: {self.max_queue_length}")
-        print(f"Average Length of the Queue: {self.total_queue_time / self.time:.4f}")
-
-        print("Average Idle Rate of Each Teller")
-        for i in self.tellers.keys():
+        average_queue_length = self.total_queue_time / self.time
+        idle_rates = []
+        for i in range(self.num_tellers):
             idle_time = self.total_idle_time.get(i)
-            idle_rate = (idle_time / self.time) if self.time > 0 else 0
-            print(f"Teller [{i}]: {idle_rate:.7f}")
+            idle_rates.append((i, (idle_time / self.time) if self.time > 0 else 0))
+
+        report = self.report
+        report.line("Simulation Statistics")
+        report.table("customers_served", ("teller", "customers"),
+                     [(i, self.customers_served.get(i)) for i in range(self.num_tellers)],
+                     line="Teller [{}]: {}", title="Customers Served by Each Teller")
+        report.field("total_time", self.time, f"Total Time of Simulation: {self.time:.2f}")
+        report.field("average_service_time", avg_service_time_per_customer,
+                     f"Average Service Time per Customer: {avg_service_time_per_customer:.4f}")
+        report.field("average_waiting_time", avg_waiting_time_per_customer,
+                     f"Average Waiting Time per Customer: {avg_waiting_time_per_customer:.3f}")
+        report.field("max_queue_length", self.max_queue_length, f"Maximum Length of the Queue: {self.max_queue_length}")
+        report.field("average_queue_length", average_queue_length,
+                     f"Average Length of the Queue: {average_queue_length:.4f}")
+        report.field("time_weighted_queue_length", self.time_weighted_queue_length())
+        report.table("idle_rate", ("teller", "idle_rate"), idle_rates,
+                     line="Teller [{}]: {:.7f}", title="Average Idle Rate of Each Teller")
+        report.flush()
 
 
 if __name__ == "__main__":
-    num_tellers_input = int(input("Please enter the number of tellers: "))
-    input_file = input("Please enter the name of the input file: ")
-    print("Simulation Inputs",
-    f"Number of tellers: {num_tellers_input}",
-    f"Name of input file: {input_file}", sep="\n", end="\n\n")
-
-    simulation = BankSimulation(num_tellers_input)
-    simulation.run(input_file)
+    parser = argparse.ArgumentParser(description="Simulate a bank queue served by several tellers.")
+    parser.add_argument("num_tellers", type=int, nargs="?", help="number of tellers (prompted for when omitted)")
+    parser.add_argument("input_file", nargs="?", help="arrivals file, or - for stdin (prompted for when omitted)")
+    parser.add_argument("--format", choices=FORMATS, default="text", help="output format (default: text)")
+    args = parser.parse_args()
+
+    num_tellers_input = args.num_tellers
+    if num_tellers_input is None:
+        num_tellers_input = int(input("Please enter the number of tellers: "))
+    input_file = args.input_file
+    if input_file is None:
+        input_file = input("Please enter the name of the input file: ")
+
+    with Report(args.format) as report:
+        report.line("Simulation Inputs")
+        report.field("num_tellers", num_tellers_input, f"Number of tellers: {num_tellers_input}")
+        report.field("input_file", input_file, f"Name of input file: {input_file}")
+        report.line()
+
+        simulation = BankSimulation(num_tellers_input, report)
+        simulation.run(read_arrivals(sys.stdin) if input_file == "-" else input_file)
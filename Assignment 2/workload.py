@@ -0,0 +1,86 @@
+import argparse
+import sys
+
+import numpy as np
+
+CHUNK_SIZE = 1 << 16  # Customers drawn from the random generator at a time
+SERVICE_DISTRIBUTIONS = ['exponential', 'uniform', 'constant', 'lognormal']
+
+
+def draw_service(rng, distribution: str, mean: float, size: int):
+    """Draw `size` service times with the given mean from the named distribution."""
+    if distribution == 'exponential':
+        return rng.exponential(mean, size)
+    if distribution == 'uniform':
+        return rng.uniform(0, 2 * mean, size)
+    if distribution == 'constant':
+        return np.full(size, mean)
+    if distribution == 'lognormal':
+        sigma = 1.0  # Heavy tailed: a few very long services
+        return rng.lognormal(np.log(mean) - sigma ** 2 / 2, sigma, size)
+    raise ValueError(f"unknown service distribution {distribution!r}")
+
+
+def generate_arrivals(customers: int, tellers: int = 1, load: float = 0.9, mean_service: float = 10.0,
+                      service: str = 'exponential', priorities=(1.0, 1.0, 1.0), seed: int = 203):
+    """Yield (arrival_time, service_time, priority) for `customers` synthetic customers.
+
+    Arrivals are a Poisson process whose rate keeps `tellers` tellers busy a `load` fraction of
+    the time. Priority p (from 1) is drawn with weight priorities[p - 1]. The customers are
+    drawn in chunks, so any number can be generated in constant memory; the same seed always
+    gives the same trace.
+    """
+    rng = np.random.default_rng(seed)
+    rate = load * tellers / mean_service
+    weights = np.asarray(priorities, dtype=np.float64)
+    weights = weights / weights.sum()
+    time = 0.0
+    for start in range(0, customers, CHUNK_SIZE):
+        size = min(CHUNK_SIZE, customers - start)
+        arrivals = time + np.cumsum(rng.exponential(1 / rate, size))
+        time = float(arrivals[-1])
+        services = draw_service(rng, service, mean_service, size)
+        levels = rng.choice(len(weights), size, p=weights) + 1
+        yield from zip(arrivals.tolist(), services.tolist(), levels.tolist())
+
+
+def write_arrivals(file, arrivals):
+    """Write customers in the arrivals file format, ending with the "0 0" line."""
+    lines = []
+    for arrival_time, service_time, priority in arrivals:
+        lines.append(f"{arrival_time:.4f} {service_time:.4f} {priority}\n")
+        if len(lines) >= CHUNK_SIZE:
+            file.writelines(lines)
+            lines.clear()
+    file.writelines(lines)
+    file.write("0 0\n")
+
+
+def main_workload():
+    """Write a synthetic arrivals file for the bank simulation."""
+    parser = argparse.ArgumentParser(description="Generate a seeded arrivals trace for the bank simulation.")
+    parser.add_argument('customers', type=int, help="number of customers, e.g. 1000 to 10000000")
+    parser.add_argument('--tellers', type=int, default=1, help="tellers the arrival rate is scaled for (default: 1)")
+    parser.add_argument('--load', type=float, default=0.9,
+                        help="fraction of the time the tellers are busy on average (default: 0.9)")
+    parser.add_argument('--mean-service', type=float, default=10.0, help="mean service time (default: 10)")
+    parser.add_argument('--service', choices=SERVICE_DISTRIBUTIONS, default='exponential',
+                        help="service time distribution (default: exponential)")
+    parser.add_argument('--priorities', type=float, nargs='+', default=[1.0, 1.0, 1.0],
+                        help="relative weight of priority 1, 2, ... (default: 1 1 1)")
+    parser.add_argument('--seed', type=int, default=203, help="random seed (default: 203)")
+    parser.add_argument('-o', '--output', help="file to write (default: stdout)")
+    args = parser.parse_args()
+
+    arrivals = generate_arrivals(args.customers, args.tellers, args.load, args.mean_service,
+                                 args.service, args.priorities, args.seed)
+    if args.output:
+        with open(args.output, 'w') as file:
+            write_arrivals(file, arrivals)
+    else:
+        write_arrivals(sys.stdout, arrivals)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_workload())
@@ -1,8 +1,32 @@
 from typing import List, Tuple, Union, Dict
+import argparse
 import math
+import os
 import sys
 from timeit import default_timer
 
+# The report writer is shared by all three assignments and lives one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from report import FORMATS, Report
+except ImportError:
+    # A copy of this folder alone has no report.py, so fall back to printing the text lines
+    FORMATS = ['text']
+
+    class Report:
+        def __init__(self, output_format='text'):
+            self.format = output_format
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            sys.stdout.flush()
+
+        def field(self, name, value, text=None):
+            if text is not None:
+                print(text)
+
 class PriorityQueue:
     def __init__(self, size: int):
         # Create a NumPy array to store (priority, item) pairs
@@ -227,9 +251,14 @@ def find_longest_path(graph: List[List[Tuple[int, int]]], start_vertex: int, goa
 
 # Main function to execute the program
 def main() -> int:
+    parser = argparse.ArgumentParser(description="Find the shortest and longest paths between two vertices.")
+    parser.add_argument("filename", nargs="?", help="graph file (prompted for when omitted)")
+    parser.add_argument("--format", choices=FORMATS, default="text", help="output format (default: text)")
+    args = parser.parse_args()
+
     start_time = default_timer()
     # Read teh graph and vertices from the input file
-    filename = input("Enter the filename: ")
+    filename = args.filename if args.filename is not None else input("Enter the filename: ")
 
     try:
         graph, vertices, start_vertex, goal_vertex = read_file(filename)
@@ -237,36 +266,29 @@ def main() -> int:
         print("Error:", e)
         return -1
 
-    print(f"Number of vertices: {len(vertices)}")
-    print(f"Number of edges: {len(graph)}")
-    print(f"Start vertex: {start_vertex + 1}")
-    print(f"Goal vertex: {goal_vertex + 1}")
-
-    euclidean_dist = euclidean_distance(vertices[start_vertex], vertices[goal_vertex])
-    print(f"Euclidean distance between {start_vertex + 1} and {goal_vertex + 1}: {euclidean_dist:.4f}")
-
-    # Find the shortest path using Dijkstra's algorithm
-    shortest_path, shortest_length = dijkstra(graph, start_vertex, goal_vertex)
-    print("Shortest path: ", end="")
-
-    for index in range(len(shortest_path)):
-        path = shortest_path[index]
-        print(path, end="")
-        if index < len(shortest_path) - 1:
-            print(" -> ", end="")
-    print(f"\nShortest path length: {shortest_length}")
-
-    # Find the longest path using DFS
-    longest_path, longest_length = find_longest_path(graph, start_vertex, goal_vertex)
-    print("Longest path: ", end="")
-    for index in range(len(longest_path)):
-        path = longest_path[index]
-        print(path, end="")
-        if index < len(longest_path) - 1:
-            print(" -> ", end="")
-    print(f"\nLongest path length: {longest_length}")
-
-    print(f"Time taken for path length: {default_timer() - start_time}" )
+    # Every result goes through one buffered report and is written out in bulk
+    with Report(args.format) as report:
+        report.field("vertices", len(vertices), f"Number of vertices: {len(vertices)}")
+        report.field("edges", len(graph), f"Number of edges: {len(graph)}")
+        report.field("start_vertex", start_vertex + 1, f"Start vertex: {start_vertex + 1}")
+        report.field("goal_vertex", goal_vertex + 1, f"Goal vertex: {goal_vertex + 1}")
+
+        euclidean_dist = euclidean_distance(vertices[start_vertex], vertices[goal_vertex])
+        report.field("euclidean_distance", euclidean_dist,
+                     f"Euclidean distance between {start_vertex + 1} and {goal_vertex + 1}: {euclidean_dist:.4f}")
+
+        # Find the shortest path using Dijkstra's algorithm
+        shortest_path, shortest_length = dijkstra(graph, start_vertex, goal_vertex)
+        report.field("shortest_path", shortest_path, "Shortest path: " + " -> ".join(map(str, shortest_path)))
+        report.field("shortest_path_length", shortest_length, f"Shortest path length: {shortest_length}")
+
+        # Find the longest path using DFS
+        longest_path, longest_length = find_longest_path(graph, start_vertex, goal_vertex)
+        report.field("longest_path", longest_path, "Longest path: " + " -> ".join(map(str, longest_path)))
+        report.field("longest_path_length", longest_length, f"Longest path length: {longest_length}")
+
+        elapsed = default_timer() - start_time
+        report.field("seconds", elapsed, f"Time taken for path length: {elapsed}")
     return 0
        
 # Run the main function if the script is executed
@@ -0,0 +1,46 @@
+import json
+import multiprocessing
+import sys
+
+try:
+    import resource  # Peak RSS is only available on Unix
+except ImportError:
+    resource = None
+
+FORMATS = ['table', 'json']
+
+
+def peak_rss_kib():
+    """Return the peak resident set size of this process in KiB, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # macOS reports bytes
+
+
+def run_isolated(measure, jobs) -> list:
+    """Return `measure(job)` for every job, each run in a fresh process so its peak RSS is its own."""
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for job in jobs:
+        with context.Pool(1) as pool:
+            results.append(pool.apply(measure, (job,)))
+    return results
+
+
+def print_table(results: list, columns: list):
+    """Print the results as an aligned text table of (title, field, format) columns."""
+    rows = [[title for title, _, _ in columns]]
+    for result in results:
+        rows.append(['-' if result[field] is None else text.format(result[field]) for _, field, text in columns])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        print('  '.join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+
+def print_results(results: list, columns: list, output_format: str = 'table'):
+    """Print the results as a table, or as JSON with every field."""
+    if output_format == 'json':
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results, columns)
@@ -0,0 +1,119 @@
+import csv
+import json
+import sys
+
+FORMATS = ['text', 'json', 'csv']
+BUFFER_SIZE = 1 << 16  # Characters gathered before each write to the stream
+
+
+# Report class to write a program's results in bulk, as prose lines, JSON or CSV
+class Report:
+    """Collect output in a buffer and write it to the stream in large pieces.
+
+    Results are recorded as named fields and tables. The text format shows them as the
+    programs' usual prose lines. JSON writes one object with a member per field or table.
+    CSV writes `section,key,value` rows. A list field gives one row per item, keyed by
+    position. A table row gives one row keyed by its first column. Tables with more than
+    two columns add a row per extra column, with the section written as `name.column`.
+    """
+
+    def __init__(self, output_format: str = 'text', stream=None, buffer_size: int = BUFFER_SIZE):
+        if output_format not in FORMATS:
+            raise ValueError(f"unknown report format {output_format!r}")
+        self.format = output_format
+        self.stream = stream if stream is not None else sys.stdout
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.buffered = 0  # Characters waiting in the buffer
+        self.members = 0  # JSON members written so far
+        self.closed = False
+        if output_format == 'json':
+            self.write('{')
+        elif output_format == 'csv':
+            self.csv = csv.writer(self, lineterminator='\n')  # Rows go through write() below
+            self.csv.writerow(('section', 'key', 'value'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, text: str):
+        """Add raw text to the buffer, writing the buffer out once it is large enough."""
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far to the stream."""
+        if self.buffer:
+            self.stream.write(''.join(self.buffer))
+            self.buffer.clear()
+            self.buffered = 0
+        self.stream.flush()
+
+    def close(self):
+        """Finish the output and write out the buffer."""
+        if self.closed:
+            return
+        self.closed = True
+        if self.format == 'json':
+            self.write('\n}\n')
+        self.flush()
+
+    def line(self, text: str = ''):
+        """Write a line of prose; the structured formats leave it out."""
+        if self.format == 'text':
+            self.write(text + '\n')
+
+    def note(self, text: str):
+        """Write a diagnostic line, in line with the prose or on stderr beside structured output."""
+        if self.format == 'text':
+            self.line(text)
+        else:
+            print(text, file=sys.stderr)
+
+    def member(self, name: str, text: str):
+        self.write(f'{"," if self.members else ""}\n  {json.dumps(name)}: {text}')
+        self.members += 1
+
+    def field(self, name: str, value, text: str = None):
+        """Record one named result, shown in prose as the line `text` if one is given."""
+        if self.format == 'text':
+            if text is not None:
+                self.line(text)
+        elif self.format == 'json':
+            self.member(name, json.dumps(value))
+        elif isinstance(value, (list, tuple)):
+            self.csv.writerows((name, position, item) for position, item in enumerate(value))
+        else:
+            self.csv.writerow((name, '', value))
+
+    def table(self, name: str, columns: tuple, rows, line: str = None, title: str = None):
+        """Record a table of rows, each a tuple matching `columns`; `rows` may be a generator.
+
+        In prose the table is shown as the line `title` followed by `line.format(*row)` for
+        every row.
+        """
+        if self.format == 'text':
+            if title is not None:
+                self.line(title)
+            if line is not None:
+                line += '\n'
+                for row in rows:
+                    self.write(line.format(*row))
+        elif self.format == 'json':
+            self.member(name, '[')
+            separator = '\n    '
+            for row in rows:
+                self.write(separator + json.dumps(dict(zip(columns, row))))
+                separator = ',\n    '
+            self.write('\n  ]' if separator != '\n    ' else ']')
+        elif len(columns) == 2:
+            self.csv.writerows((name, key, value) for key, value in rows)
+        else:
+            sections = [f'{name}.{column}' for column in columns[1:]]
+            for row in rows:
+                self.csv.writerows((section, row[0], value) for section, value in zip(sections, row[1:]))